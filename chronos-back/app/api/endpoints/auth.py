@@ -1,18 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import JSONResponse
 
 from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.hashing import hash_pool
+from app.core.rate_limit import TokenBucketLimiter
 from app.schemas.auth import Token, UserCreate, User, LoginSchema, OnboardingSchema, UserUpdate
 from app.services.auth import AuthService
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+ip_limiter = TokenBucketLimiter(capacity=settings.AUTH_RATE_LIMIT_IP_BURST,
+                                refill_per_minute=settings.AUTH_RATE_LIMIT_IP_PER_MINUTE,
+                                max_keys=settings.AUTH_RATE_LIMIT_MAX_KEYS)
+username_limiter = TokenBucketLimiter(capacity=settings.AUTH_RATE_LIMIT_USERNAME_BURST,
+                                      refill_per_minute=settings.AUTH_RATE_LIMIT_USERNAME_PER_MINUTE,
+                                      max_keys=settings.AUTH_RATE_LIMIT_MAX_KEYS)
+
+
+def client_ip(request: Request) -> str:
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if settings.AUTH_RATE_LIMIT_TRUST_FORWARDED_FOR and forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests, try again later.",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def admit(request: Request, username: str) -> None:
+    retry_after = ip_limiter.acquire(client_ip(request))
+    if retry_after:
+        raise too_many_requests(retry_after)
+
+    retry_after = username_limiter.acquire(username.strip().lower())
+    if retry_after:
+        raise too_many_requests(retry_after)
+
+    if hash_pool.queue_depth >= settings.PASSWORD_HASH_MAX_PENDING:
+        avg_run_ms = hash_pool.stats()['avg_run_ms'] or 1000
+        raise too_many_requests(hash_pool.queue_depth / hash_pool.max_concurrency * avg_run_ms / 1000)
+
 
 @router.post("/register")
 async def register(
+    request: Request,
     user_data: UserCreate):
+    admit(request, user_data.email)
     try:
         auth_service = AuthService()
 
@@ -28,7 +70,9 @@ async def register(
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: LoginSchema):
+    admit(request, form_data.username)
     auth_service = AuthService()
     user = await auth_service.authenticate_user(form_data.username, form_data.password)
     
@@ -39,19 +83,7 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = auth_service.create_access_token(data={
-        "email": user["email"],
-        "birth_date": str(user["birth_date"]),
-        "first_name": user["first_name"],
-        "last_name": user["last_name"],
-        "is_first_access": user["is_first_access"],
-        "monthly_goal": user["monthly_goal"],
-        "daily_goal": user["daily_goal"],
-        "week_days_list":user["week_day_list"],
-        "theme": user["theme"],
-        "language": user["language"]
-
-    })
+    access_token = auth_service.create_access_token(data=auth_service.token_claims(user))
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -81,4 +113,13 @@ async def patch_user(
                                               theme=user_data.theme, user_id=user_id, week_days_list=user_data.week_days_list,
                                               language=user_data.language)
 
-    return JSONResponse(content=response, status_code=response['status_code'])
\ No newline at end of file
+    return JSONResponse(content=response, status_code=response['status_code'])
+
+
+@router.post("/revoke")
+async def revoke_tokens(current_user: User = Depends(get_current_user)):
+    user_id = current_user.get('id')
+
+    response = await AuthService().revoke_tokens(user_id=user_id)
+
+    return JSONResponse(content=response, status_code=response['status_code'])
@@ -1,30 +1,43 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request
 from fastapi.params import Depends
 from app.schemas.auth import User
 from app.core.auth import get_current_user
-from app.schemas.entries import ProjectSchema, EntriesSchema
+from app.core.etag import data_etag, is_not_modified, not_modified, response_headers
+from app.schemas.entries import ProjectSchema, EntriesSchema, EntriesBatchSchema
 from app.services.entries import Entries
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 
 router = APIRouter()
 
+RESULT_FORMAT_PATTERN = "^(dict|tuples|columns)$"
+
 
 
 @router.get("/")
-async def get_entries(dat_start: str = Query(None, alias="dat_start"),
+async def get_entries(request: Request,
+                      dat_start: str = Query(None, alias="dat_start"),
                       dat_end: str = Query(None, alias="dat_end"),
-                      limit: int = Query(None, alias="limit"),
-                      offset: int = Query(None, alias="offset"),
+                      limit: int = Query(None, alias="limit", ge=1),
+                      offset: int = Query(None, alias="offset", ge=0),
+                      cursor: str = Query(None, alias="cursor"),
                       require_total_count: bool = Query(False, alias="require_total_count"),
+                      count_mode: str = Query('exact', pattern="^(exact|estimate)$"),
                       search: str = Query(None, alias="search"),
+                      result_format: str = Query('dict', pattern=RESULT_FORMAT_PATTERN),
                       current_user: User = Depends(get_current_user)):
     user_id = current_user.get('id')
+    etag = data_etag(request, user_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
 
     response = await Entries(user_id).get_entries(dat_start=dat_start, dat_end=dat_end, limit=limit, offset=offset,
-                                                  require_total_count=require_total_count, search=search)
+                                                  require_total_count=require_total_count, search=search,
+                                                  result_format=result_format, cursor=cursor,
+                                                  count_mode=count_mode)
 
-    return JSONResponse(content=response, status_code=response['status_code'])
+    return JSONResponse(content=response, status_code=response['status_code'],
+                        headers=response_headers(response, etag))
 
 @router.post("/")
 async def create_entry(entry_data: EntriesSchema,
@@ -39,6 +52,15 @@ async def create_entry(entry_data: EntriesSchema,
 
     return JSONResponse(content=response, status_code=response['status_code'])
 
+@router.post("/batch")
+async def create_entries(batch_data: EntriesBatchSchema,
+                         current_user: User = Depends(get_current_user)):
+    user_id = current_user.get('id')
+
+    response = await Entries(user_id).create_entries(entries=batch_data.entries)
+
+    return JSONResponse(content=response, status_code=response['status_code'])
+
 @router.delete("/")
 async def delete_entry(entry_id: int, current_user: User = Depends(get_current_user)):
     user_id = current_user.get('id')
@@ -59,41 +81,120 @@ async def put_entry(entry_id: int, entry_data: EntriesSchema, current_user: User
 
 
 @router.get("/streak")
-async def get_entries_streak(current_user: User = Depends(get_current_user)):
+async def get_entries_streak(request: Request, current_user: User = Depends(get_current_user)):
     user_id = current_user.get('id')
+    etag = data_etag(request, user_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
 
     response = await Entries(user_id).get_entries_streak()
 
-    return JSONResponse(content=response, status_code=response['status_code'])
+    return JSONResponse(content=response, status_code=response['status_code'],
+                        headers=response_headers(response, etag))
+
+@router.get("/heatmap")
+async def get_entries_heatmap(request: Request,
+                              year: int = Query(None, alias="year"),
+                              current_user: User = Depends(get_current_user)):
+    user_id = current_user.get('id')
+    etag = data_etag(request, user_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    response = await Entries(user_id).get_entries_heatmap(year=year)
+
+    return JSONResponse(content=response, status_code=response['status_code'],
+                        headers=response_headers(response, etag))
+
+@router.get("/dashboard")
+async def get_dashboard(request: Request,
+                        dat_start: str = Query('dat_start'),
+                        dat_end: str = Query('dat_end'),
+                        result_format: str = Query('dict', pattern=RESULT_FORMAT_PATTERN),
+                        current_user: User = Depends(get_current_user)):
+    user_id = current_user.get('id')
+    etag = data_etag(request, user_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    response = await Entries(user_id).get_dashboard(dat_start=dat_start, dat_end=dat_end,
+                                                    result_format=result_format)
+
+    return JSONResponse(content=response, status_code=response['status_code'],
+                        headers=response_headers(response, etag))
+
+@router.get("/export")
+async def export_entries(export_format: str = Query('csv', alias="format", pattern="^(csv|ndjson|parquet)$"),
+                         dat_start: str = Query(None, alias="dat_start"),
+                         dat_end: str = Query(None, alias="dat_end"),
+                         current_user: User = Depends(get_current_user)):
+    user_id = current_user.get('id')
+
+    response = await Entries(user_id).open_export(export_format=export_format, dat_start=dat_start, dat_end=dat_end)
+    if not response['status']:
+        return JSONResponse(content=response, status_code=response['status_code'])
+
+    return StreamingResponse(response['stream'], media_type=response['media_type'],
+                             headers={"Content-Disposition": f'attachment; filename="{response["filename"]}"',
+                                      "Cache-Control": "private, no-store"})
+
+@router.get("/stream")
+async def stream_dashboard(dat_start: str = Query('dat_start'),
+                           dat_end: str = Query('dat_end'),
+                           current_user: User = Depends(get_current_user)):
+    user_id = current_user.get('id')
+
+    response = await Entries(user_id).open_dashboard_stream(dat_start=dat_start, dat_end=dat_end)
+    if not response['status']:
+        return JSONResponse(content=response, status_code=response['status_code'])
+
+    return StreamingResponse(response['stream'], media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/days")
-async def get_entries_days(dat_start: str = Query('dat_start'),
+async def get_entries_days(request: Request,
+                           dat_start: str = Query('dat_start'),
                            dat_end: str = Query('dat_end'),
+                           result_format: str = Query('dict', pattern=RESULT_FORMAT_PATTERN),
                            current_user: User = Depends(get_current_user)):
     user_id = current_user.get('id')
+    etag = data_etag(request, user_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
 
-    response = await Entries(user_id).get_days_entries(dat_start=dat_start, dat_end=dat_end)
+    response = await Entries(user_id).get_days_entries(dat_start=dat_start, dat_end=dat_end,
+                                                       result_format=result_format)
 
-    return JSONResponse(content=response, status_code=response['status_code'])
+    return JSONResponse(content=response, status_code=response['status_code'],
+                        headers=response_headers(response, etag))
 
 @router.get("/cards")
-async def get_entries_cards(dat_start: str = Query('dat_start'),
+async def get_entries_cards(request: Request,
+                            dat_start: str = Query('dat_start'),
                             dat_end: str = Query('dat_end'),
                             current_user: User = Depends(get_current_user)):
     user_id = current_user.get('id')
+    etag = data_etag(request, user_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
 
     response = await Entries(user_id).get_entries_cards(dat_start=dat_start, dat_end=dat_end)
 
-    return JSONResponse(content=response, status_code=response['status_code'])
+    return JSONResponse(content=response, status_code=response['status_code'],
+                        headers=response_headers(response, etag))
 
 
 @router.get("/projects")
-async def get_projects(current_user: User = Depends(get_current_user)):
+async def get_projects(request: Request, current_user: User = Depends(get_current_user)):
     user_id = current_user.get('id')
+    etag = data_etag(request, user_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
 
     response = await Entries(user_id).get_projects()
 
-    return JSONResponse(content=response, status_code=response['status_code'])
+    return JSONResponse(content=response, status_code=response['status_code'],
+                        headers=response_headers(response, etag))
 
 @router.post("/projects")
 async def create_project(
@@ -1,8 +1,10 @@
-from fastapi import Depends, HTTPException, status
+import secrets
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.services.auth import AuthService
+from app.core.config import settings
+from app.services.auth import AuthService, token_versions
 from app.schemas.auth import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -18,13 +20,21 @@ async def get_current_user(
     )
     
     auth_service = AuthService()
-    email = auth_service.verify_token(token)
-    
-    if email is None:
+    payload = auth_service.decode_token(token)
+
+    if payload is None or payload.get("email") is None:
         raise credentials_exception
+
+    if settings.STATELESS_AUTH and payload.get("user_id") is not None:
+        if not await token_versions.is_valid(payload["user_id"], payload.get("token_version", 0)):
+            raise credentials_exception
+
+        return {**payload, "id": payload["user_id"], "status": True}
+
+    email = payload["email"]
     
     user = await auth_service.get_user_by_email(email)
-    if user is None:
+    if user is None or payload.get("token_version", 0) < (user.get("token_version") or 0):
         raise credentials_exception
     
     return user
@@ -37,3 +47,8 @@ async def get_current_active_user(
         raise HTTPException(status_code=400, detail="Usuário inativo")
     return current_user
 
+
+async def require_internal_token(x_internal_token: str = Header(None)) -> None:
+    if not settings.INTERNAL_API_TOKEN or not x_internal_token or \
+            not secrets.compare_digest(x_internal_token, settings.INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None,
+                 size_of: Optional[Callable[[Hashable, Any], int]] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.size_of = size_of
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.memory_bytes = 0
+        self.__data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.__lookup(key) is not None
+
+    def __lookup(self, key: Hashable) -> Optional[tuple]:
+        item = self.__data.get(key)
+        if item is None:
+            return None
+
+        expires_at = item[1]
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.__remove(key)
+            return None
+
+        self.__data.move_to_end(key)
+        return item
+
+    def __remove(self, key: Hashable) -> Optional[tuple]:
+        item = self.__data.pop(key, None)
+        if item is not None:
+            self.memory_bytes -= item[2]
+        return item
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self.__lookup(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return item[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = self.size_of(key, value) if self.size_of else 0
+
+        self.__remove(key)
+        self.__data[key] = (value, expires_at, size)
+        self.memory_bytes += size
+
+        while len(self.__data) > self.max_size:
+            _, item = self.__data.popitem(last=False)
+            self.memory_bytes -= item[2]
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self.__remove(key)
+        return item[0] if item is not None else default
+
+    def clear(self) -> None:
+        self.__data.clear()
+        self.memory_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.__data),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'memory_bytes': self.memory_bytes if self.size_of else None,
+        }
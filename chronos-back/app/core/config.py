@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 from dotenv import load_dotenv
 
@@ -13,10 +13,72 @@ class Settings(BaseSettings):
     
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    USER_CACHE_MAX_SIZE: int = 2048
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    TOKEN_CACHE_MAX_SIZE: int = 4096
+
+    STATELESS_AUTH: bool = False
+    TOKEN_VERSION_REFRESH_SECONDS: int = 30
+
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    AUTH_RATE_LIMIT_IP_BURST: int = 20
+    AUTH_RATE_LIMIT_IP_PER_MINUTE: float = 20
+    AUTH_RATE_LIMIT_USERNAME_BURST: int = 5
+    AUTH_RATE_LIMIT_USERNAME_PER_MINUTE: float = 5
+    AUTH_RATE_LIMIT_MAX_KEYS: int = 10000
+    AUTH_RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
     
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    DATABASE_REPLICA_URL: Optional[str] = os.getenv("DATABASE_REPLICA_URL")
+    READ_YOUR_WRITES_SECONDS: int = 10
+
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP: int = 5
+    DB_CONNECT_TIMEOUT: float = 10
+    DB_COMMAND_TIMEOUT: Optional[float] = None
+    READINESS_TIMEOUT_SECONDS: float = 2
+
+    REQUEST_UNIT_OF_WORK: bool = False
+
+    STATEMENT_CACHE_SIZE: int = 512
+    DB_QUERY_CACHE_SIZE: int = 1200
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+
+    DB_ECHO: bool = False
+    SLOW_QUERY_MS: float = 500
+    QUERY_LOG_SAMPLE_RATE: float = 0.0
+    QUERY_STATS_WINDOW: int = 1000
+
+    BULK_INSERT_CHUNK_SIZE: int = 1000
+    STREAM_BATCH_SIZE: int = 1000
+    EXPORT_MAX_CONCURRENCY: int = 2
+
+    ENTRIES_MAX_PAGE_SIZE: int = 100
+    ENTRIES_BATCH_MAX_SIZE: int = 500
+
+    WEB_CONCURRENCY: int = 1
+    EVENTS_BACKEND: Optional[str] = None
+    EVENTS_CHANNEL: str = "chronos_entries"
+    EVENTS_LISTENER_HEALTH_SECONDS: float = 30
+    SSE_HEARTBEAT_SECONDS: float = 15
+    SSE_RETRY_MS: int = 5000
+    SSE_REFRESH_CONCURRENCY: int = 4
+    SSE_REFRESH_JITTER_SECONDS: float = 2
+
+    ENTRIES_ETAGS: Optional[bool] = None
 
     SECRET_KEY: str = os.getenv("SECRET_KEY")
+    INTERNAL_API_TOKEN: Optional[str] = None
 
     ALLOWED_HOSTS: List[str] = [
         "http://localhost:3000",
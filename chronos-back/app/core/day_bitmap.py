@@ -0,0 +1,54 @@
+import calendar
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+# One bit per day of year, LSB-first inside each byte, matching Postgres get_bit/set_bit on bytea.
+BITMAP_BYTES = 46
+
+
+def days_in_year(year: int) -> int:
+    return 366 if calendar.isleap(year) else 365
+
+
+def day_index(day: date) -> int:
+    return day.timetuple().tm_yday - 1
+
+
+def to_int(days: Optional[bytes]) -> int:
+    return int.from_bytes(days, 'little') if days else 0
+
+
+def to_list(days: Optional[bytes], year: int) -> List[int]:
+    bits = to_int(days)
+    return [(bits >> index) & 1 for index in range(days_in_year(year))]
+
+
+def join_years(bitmaps: Dict[int, bytes], until: date) -> Tuple[int, int]:
+    bits, offset = 0, 0
+    for year in range(min(bitmaps, default=until.year), until.year):
+        bits |= (to_int(bitmaps.get(year)) & ((1 << days_in_year(year)) - 1)) << offset
+        offset += days_in_year(year)
+
+    until_index = offset + day_index(until)
+    bits |= (to_int(bitmaps.get(until.year)) & ((1 << (day_index(until) + 1)) - 1)) << offset
+    return bits, until_index
+
+
+def run_ending_at(bits: int, index: int) -> int:
+    if not (bits >> index) & 1:
+        return 0
+    gaps = ~bits & ((1 << (index + 1)) - 1)
+    return index - gaps.bit_length() + 1
+
+
+def longest_run(bits: int) -> int:
+    length = 0
+    while bits:
+        bits &= bits << 1
+        length += 1
+    return length
+
+
+def streaks(bitmaps: Dict[int, bytes], today: date) -> Tuple[int, int]:
+    bits, today_index = join_years(bitmaps, today)
+    return run_ending_at(bits, today_index), longest_run(bits)
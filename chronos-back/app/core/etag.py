@@ -0,0 +1,49 @@
+import hashlib
+import secrets
+from datetime import date
+from typing import Any, Dict, Hashable, Optional
+from fastapi import Request
+from fastapi.responses import Response
+from app.core.config import settings
+from app.core.events import event_bus, events_backend
+
+PROCESS_EPOCH = secrets.token_hex(8)
+
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+
+def etags_enabled() -> bool:
+    if settings.ENTRIES_ETAGS is None:
+        return events_backend() == 'postgres'
+    return settings.ENTRIES_ETAGS
+
+
+def data_etag(request: Request, key: Hashable) -> Optional[str]:
+    if not etags_enabled():
+        return None
+
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    version = f"{PROCESS_EPOCH}|{event_bus.generation}|{key}|{event_bus.version(key)}"
+    digest = hashlib.sha256(f"{version}|{date.today()}|{request.url.path}?{query}".encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    return {**CACHE_HEADERS, "ETag": etag}
+
+
+def response_headers(response: Dict[str, Any], etag: Optional[str]) -> Dict[str, str]:
+    return etag_headers(etag) if etag and response['status'] else CACHE_HEADERS
+
+
+def is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not etag or not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, Optional
+from app.core.config import settings
+from app.db.routing import primary_pins
+
+logger = logging.getLogger("chronos.events")
+
+
+def events_backend() -> str:
+    if settings.EVENTS_BACKEND is None:
+        return 'postgres' if settings.WEB_CONCURRENCY > 1 else 'local'
+    return settings.EVENTS_BACKEND
+
+
+class EventBus:
+    def __init__(self):
+        self.published = 0
+        self.generation = 0
+        self.__versions: Dict[Hashable, int] = {}
+        self.__events: Dict[Hashable, asyncio.Event] = {}
+        self.__subscribers: Dict[Hashable, int] = {}
+
+    def version(self, key: Hashable) -> int:
+        return self.__versions.get(key, 0)
+
+    def publish(self, key: Hashable) -> int:
+        version = self.__versions[key] = self.__versions.get(key, 0) + 1
+        self.published += 1
+        event = self.__events.pop(key, None)
+        if event is not None:
+            event.set()
+        return version
+
+    def publish_all(self) -> None:
+        self.generation += 1
+        for key in set(self.__versions) | set(self.__events):
+            self.publish(key)
+
+    async def wait(self, key: Hashable, version: int, timeout: Optional[float] = None) -> int:
+        if self.version(key) != version:
+            return self.version(key)
+
+        event = self.__events.get(key)
+        if event is None:
+            event = self.__events[key] = asyncio.Event()
+
+        self.__subscribers[key] = self.__subscribers.get(key, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.__subscribers[key] -= 1
+            if not self.__subscribers[key]:
+                del self.__subscribers[key]
+                if self.__events.get(key) is event and not event.is_set():
+                    del self.__events[key]
+
+        return self.version(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'published': self.published,
+            'generation': self.generation,
+            'tracked_keys': len(self.__versions),
+            'waiting_keys': len(self.__subscribers),
+            'waiters': sum(self.__subscribers.values()),
+        }
+
+
+class PostgresListener:
+    def __init__(self, bus: EventBus, channel: str, health_seconds: float = 30, max_backoff_seconds: float = 30):
+        self.bus = bus
+        self.channel = channel
+        self.health_seconds = health_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.received = 0
+        self.reconnects = 0
+        self.__connection = None
+        self.__task: Optional[asyncio.Task] = None
+        self.__lost: Optional[asyncio.Event] = None
+
+    def __notify(self, connection, pid, channel, payload) -> None:
+        self.received += 1
+        try:
+            key = int(payload)
+        except ValueError:
+            logger.warning("Ignoring notification with invalid payload %r on %s", payload, channel)
+            return
+        # A tagged body must match the version in its tag, so reads stay on the primary until the replica catches up.
+        primary_pins.pin(key)
+        self.bus.publish(key)
+
+    def __terminated(self, connection) -> None:
+        if self.__lost is not None:
+            self.__lost.set()
+
+    async def __listen(self, engine) -> Any:
+        self.__lost = asyncio.Event()
+        self.__connection = await engine.connect()
+        raw_connection = (await self.__connection.get_raw_connection()).driver_connection
+        raw_connection.add_termination_listener(self.__terminated)
+        await raw_connection.add_listener(self.channel, self.__notify)
+        return raw_connection
+
+    async def __release(self, is_healthy: bool) -> None:
+        connection, self.__connection = self.__connection, None
+        if connection is None:
+            return
+        try:
+            if is_healthy:
+                raw_connection = (await connection.get_raw_connection()).driver_connection
+                await raw_connection.remove_listener(self.channel, self.__notify)
+                raw_connection.remove_termination_listener(self.__terminated)
+                await connection.close()
+            else:
+                await connection.invalidate()
+        except Exception:
+            logger.warning("Failed to release the %s listener connection", self.channel, exc_info=True)
+
+    async def __run(self, engine, raw_connection) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                if raw_connection is None:
+                    raw_connection = await self.__listen(engine)
+                    self.reconnects += 1
+                    # Notifications sent while disconnected are lost, so every subscriber has to refresh.
+                    self.bus.publish_all()
+                    logger.info("Reconnected the %s listener", self.channel)
+                backoff = 1.0
+
+                while True:
+                    try:
+                        await asyncio.wait_for(self.__lost.wait(), self.health_seconds)
+                        raise ConnectionError("listener connection terminated")
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(raw_connection.execute("SELECT 1"), self.health_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Lost the %s listener connection, reconnecting in %ss", self.channel, backoff,
+                               exc_info=True)
+                raw_connection = None
+                await self.__release(is_healthy=False)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff_seconds)
+
+    async def start(self, engine) -> None:
+        raw_connection = await self.__listen(engine)
+        self.__task = asyncio.create_task(self.__run(engine, raw_connection))
+
+    async def stop(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+        await self.__release(is_healthy=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'channel': self.channel, 'listening': self.__connection is not None, 'received': self.received,
+                'reconnects': self.reconnects}
+
+
+event_bus = EventBus()
+event_listener = PostgresListener(event_bus, settings.EVENTS_CHANNEL,
+                                  health_seconds=settings.EVENTS_LISTENER_HEALTH_SECONDS)
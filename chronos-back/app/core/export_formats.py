@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List, Sequence, Tuple
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_safe(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class ChunkSink(io.RawIOBase):
+    def __init__(self):
+        super().__init__()
+        self.position = 0
+        self.__chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.__chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.__chunks)
+        self.__chunks.clear()
+        return data
+
+
+def load_pyarrow():
+    import pyarrow
+    import pyarrow.parquet
+    return pyarrow, pyarrow.parquet
+
+
+async def to_csv(columns: Sequence[Tuple[str, str]], batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=[name for name, _ in columns], extrasaction='ignore')
+    writer.writeheader()
+    async for rows in batches:
+        writer.writerows({key: csv_safe(value) for key, value in row.items()} for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def to_ndjson(columns: Sequence[Tuple[str, str]], batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    names = [name for name, _ in columns]
+    async for rows in batches:
+        yield ''.join(json.dumps({name: row.get(name) for name in names}, default=str) + '\n'
+                      for row in rows).encode()
+
+
+async def to_parquet(columns: Sequence[Tuple[str, str]], batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    pyarrow, parquet = load_pyarrow()
+    schema = pyarrow.schema([(name, getattr(pyarrow, type_name)()) for name, type_name in columns])
+
+    sink = ChunkSink()
+    writer = parquet.ParquetWriter(sink, schema)
+    try:
+        async for rows in batches:
+            writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+EXPORT_WRITERS = {'csv': to_csv, 'ndjson': to_ndjson, 'parquet': to_parquet}
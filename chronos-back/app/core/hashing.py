@@ -0,0 +1,116 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from passlib.context import CryptContext
+from app.core.config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashPool:
+    def __init__(self, executor_type: str = 'thread', max_workers: int = 4, max_concurrency: Optional[int] = None):
+        if executor_type not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor type: {executor_type}")
+
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self.__executor: Optional[Executor] = None
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_time = 0.0
+        self.total_run_time = 0.0
+        self.max_wait_time = 0.0
+        self.max_run_time = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self.__executor is None:
+            if self.executor_type == 'process':
+                self.__executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self.__executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hash')
+        return self.__executor
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.__semaphore
+
+    @property
+    def queue_depth(self) -> int:
+        return self.waiting + self.running
+
+    async def run(self, function: Callable[..., Any], *args) -> Any:
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        wait_time = started_at - queued_at
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+        self.running += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self.semaphore.release()
+
+        run_time = time.perf_counter() - started_at
+        self.completed += 1
+        self.total_run_time += run_time
+        self.max_run_time = max(self.max_run_time, run_time)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'executor_type': self.executor_type,
+            'max_workers': self.max_workers,
+            'max_concurrency': self.max_concurrency,
+            'waiting': self.waiting,
+            'running': self.running,
+            'queue_depth': self.queue_depth,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avg_wait_ms': round(self.total_wait_time / self.completed * 1000, 2) if self.completed else None,
+            'max_wait_ms': round(self.max_wait_time * 1000, 2),
+            'avg_run_ms': round(self.total_run_time / self.completed * 1000, 2) if self.completed else None,
+            'max_run_ms': round(self.max_run_time * 1000, 2),
+        }
+
+
+hash_pool = HashPool(executor_type=settings.PASSWORD_HASH_EXECUTOR, max_workers=settings.PASSWORD_HASH_WORKERS,
+                     max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY)
@@ -0,0 +1,85 @@
+import json
+import logging
+import random
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger("chronos.sql")
+
+query_label: ContextVar[Optional[str]] = ContextVar('query_label', default=None)
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class QueryStats:
+    def __init__(self, window: int = 1000, slow_query_ms: float = 500, sample_rate: float = 0.0):
+        self.window = window
+        self.slow_query_ms = slow_query_ms
+        self.sample_rate = sample_rate
+        self.__durations: Dict[str, deque] = {}
+        self.__counters: Dict[str, Dict[str, int]] = {}
+
+    def record(self, name: str, duration_ms: float, statement: Any = None, parameters: Optional[dict] = None,
+               error: Optional[BaseException] = None) -> None:
+        durations = self.__durations.get(name)
+        if durations is None:
+            durations = self.__durations[name] = deque(maxlen=self.window)
+            self.__counters[name] = {'count': 0, 'errors': 0, 'slow': 0}
+
+        counters = self.__counters[name]
+        durations.append(duration_ms)
+        counters['count'] += 1
+        if error is not None:
+            counters['errors'] += 1
+
+        is_slow = duration_ms >= self.slow_query_ms
+        if is_slow:
+            counters['slow'] += 1
+
+        if is_slow or error is not None:
+            level = logging.WARNING
+        elif self.sample_rate and random.random() < self.sample_rate:
+            level = logging.INFO
+        else:
+            return
+
+        if not logger.isEnabledFor(level):
+            return
+
+        record = {
+            'event': 'slow_query' if is_slow else 'query',
+            'query_name': name,
+            'duration_ms': round(duration_ms, 3),
+            'parameters': sorted(parameters) if parameters else [],
+            'statement': ' '.join(str(statement).split())[:2000] if statement is not None else None,
+        }
+        if error is not None:
+            record['error'] = repr(error)
+        logger.log(level, json.dumps(record))
+
+    def stats(self, name: Optional[str] = None) -> Dict[str, Any]:
+        names = [name] if name else sorted(self.__durations)
+        result = {}
+        for query_name in names:
+            durations = self.__durations.get(query_name)
+            if not durations:
+                continue
+            values = sorted(durations)
+            result[query_name] = {
+                **self.__counters[query_name],
+                'p50_ms': round(percentile(values, 0.50), 3),
+                'p95_ms': round(percentile(values, 0.95), 3),
+                'p99_ms': round(percentile(values, 0.99), 3),
+                'max_ms': round(values[-1], 3),
+                'window': len(values),
+            }
+        return result
+
+
+query_stats = QueryStats(window=settings.QUERY_STATS_WINDOW, slow_query_ms=settings.SLOW_QUERY_MS,
+                         sample_rate=settings.QUERY_LOG_SAMPLE_RATE)
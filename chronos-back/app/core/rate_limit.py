@@ -0,0 +1,43 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+
+class TokenBucketLimiter:
+    def __init__(self, capacity: int, refill_per_minute: float, max_keys: int = 10000):
+        self.capacity = capacity
+        self.refill_rate = refill_per_minute / 60
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.rejected = 0
+        self.__buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+
+    def acquire(self, key: Hashable, cost: float = 1) -> float:
+        now = time.monotonic()
+        bucket = self.__buckets.get(key)
+        if bucket is None:
+            bucket = [float(self.capacity), now]
+            self.__buckets[key] = bucket
+            while len(self.__buckets) > self.max_keys:
+                self.__buckets.popitem(last=False)
+        else:
+            self.__buckets.move_to_end(key)
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_rate)
+            bucket[1] = now
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            self.allowed += 1
+            return 0
+
+        self.rejected += 1
+        return (cost - bucket[0]) / self.refill_rate if self.refill_rate else float('inf')
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'capacity': self.capacity,
+            'refill_per_minute': self.refill_rate * 60,
+            'tracked_keys': len(self.__buckets),
+            'allowed': self.allowed,
+            'rejected': self.rejected,
+        }
@@ -0,0 +1,41 @@
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+RESULT_FORMATS = ('dict', 'tuples', 'columns', 'rows')
+
+
+@lru_cache(maxsize=256)
+def row_class(keys: Tuple[str, ...]):
+    return namedtuple('Row', keys, rename=True)
+
+
+def to_dicts(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def to_tuples(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> Dict[str, Any]:
+    return {'columns': list(keys), 'rows': [tuple(row) for row in rows]}
+
+
+def to_columns(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> Dict[str, List[Any]]:
+    if not rows:
+        return {key: [] for key in keys}
+    return {key: list(values) for key, values in zip(keys, zip(*rows))}
+
+
+def to_rows(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> List[Any]:
+    row_type = row_class(tuple(keys))
+    return [row_type._make(row) for row in rows]
+
+
+def format_rows(keys: Sequence[str], rows: Sequence[Sequence[Any]], result_format: str = 'dict') -> Any:
+    if result_format == 'dict':
+        return to_dicts(keys, rows)
+    if result_format == 'tuples':
+        return to_tuples(keys, rows)
+    if result_format == 'columns':
+        return to_columns(keys, rows)
+    if result_format == 'rows':
+        return to_rows(keys, rows)
+    raise ValueError(f"Unknown result format: {result_format}")
@@ -1,13 +1,52 @@
+import itertools
+import time
 from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Union
-from app.db.session import AsyncSessionLocal
+from typing import List, Dict, Any, AsyncIterator, Callable, Hashable, Iterable, Optional, Union
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.query_stats import query_label, query_stats
+from app.core.result_formats import format_rows
+from app.db.routing import mark_written, session_factory
+from app.db.session import pool_wait
+from app.db.unit_of_work import current_session, unit_of_work
+
+
+class StatementCache(TTLCache):
+    def __init__(self, max_size: int):
+        super().__init__(max_size=max_size)
+        self.operations: Dict[str, Dict[str, int]] = {}
+
+    def get_or_build(self, key: Hashable, build: Callable[[], str]) -> TextClause:
+        counters = self.operations.setdefault(key[0], {'hits': 0, 'misses': 0})
+        statement = self.get(key)
+        if statement is not None:
+            counters['hits'] += 1
+            return statement
+
+        counters['misses'] += 1
+        statement = text(build())
+        self.set(key, statement)
+        return statement
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats['operations'] = {
+            operation: {**counters, 'hit_rate': round(counters['hits'] / (counters['hits'] + counters['misses']), 4)}
+            for operation, counters in self.operations.items()
+        }
+        return stats
+
+
+statement_cache = StatementCache(max_size=settings.STATEMENT_CACHE_SIZE)
+column_types_cache = TTLCache(max_size=256)
 
 
 
 class SQLQueryAsync:
     def __init__(self):
-        pass
+        self.user_id = None
 
 
     @staticmethod
@@ -20,28 +59,66 @@ class SQLQueryAsync:
 
 
 
-    async def __query(self, query: str, parameters: Optional[Dict[str, Any]] = None, is_serialized: bool = True,
-                      is_commit: bool = False) -> Optional[List[Dict[str, Any]]]:
+    async def __query(self, query: Union[str, TextClause], parameters: Optional[Dict[str, Any]] = None,
+                      is_serialized: bool = True, is_commit: bool = False,
+                      result_format: str = 'dict', query_name: Optional[str] = None,
+                      is_replica: bool = False) -> Optional[List[Dict[str, Any]]]:
         if parameters is None:
             parameters = {}
         self.parse_list_to_tuple(parameters)
 
-        async with AsyncSessionLocal() as session:
+        if isinstance(query, str):
+            query = statement_cache.get_or_build(('query', query), lambda: query)
+
+        query_name = query_name or query_label.get() or 'sql'
+        started_at = time.perf_counter()
+        try:
+            result = await self.__execute(query, parameters, is_serialized, is_commit, result_format, is_replica)
+        except Exception as e:
+            query_stats.record(query_name, (time.perf_counter() - started_at) * 1000, query, parameters, error=e)
+            raise
+
+        query_stats.record(query_name, (time.perf_counter() - started_at) * 1000, query, parameters)
+        return result
+
+
+
+    async def __execute(self, query: TextClause, parameters: Dict[str, Any], is_serialized: bool, is_commit: bool,
+                        result_format: str, is_replica: bool) -> Optional[Any]:
+        session = current_session.get()
+        if session is not None:
+            result = await session.execute(query, parameters)
+            if is_commit:
+                mark_written(self.user_id)
+            return self.__fetch(result, is_serialized, result_format)
+
+        async with session_factory(is_replica=is_replica, user_id=self.user_id)() as session:
             try:
-                result = await session.execute(text(query), parameters)
-                if not is_commit:
-                    rows = result.fetchall()
-                    return [dict(row._mapping) for row in rows] if is_serialized else list(rows)
-                else:
+                checkout_started_at = time.perf_counter()
+                await session.connection()
+                pool_wait.record(time.perf_counter() - checkout_started_at)
+
+                result = await session.execute(query, parameters)
+                rows = self.__fetch(result, is_serialized, result_format)
+                if is_commit:
                     await session.commit()
-                    return None
+                    mark_written(self.user_id)
+                return rows
             except Exception as e:
-                print(e)
                 await session.rollback()
                 raise e
 
 
 
+    @staticmethod
+    def __fetch(result, is_serialized: bool, result_format: str = 'dict') -> Optional[Any]:
+        if not result.returns_rows:
+            return None
+        rows = result.fetchall()
+        return format_rows(tuple(result.keys()), rows, result_format) if is_serialized else rows
+
+
+
     @staticmethod
     def format_result(result: Optional[List[Dict[str, Any]]], is_values_list: bool = False, is_first: bool = False) -> Union[Dict[str, Any], List[Any], Any]:
         if not result:
@@ -50,7 +127,7 @@ class SQLQueryAsync:
         if is_values_list:
             return_list = []
             for row in result:
-                values = tuple(row.values())
+                values = tuple(row.values()) if isinstance(row, dict) else tuple(row)
                 return_list.append(values[0] if len(values) == 1 else values)
             result = return_list
 
@@ -58,12 +135,50 @@ class SQLQueryAsync:
 
 
 
-    async def select(self, query: str, parameters: Dict[str, Any] = {}, is_values_list: bool = False, is_first: bool = False) -> Union[Dict[str, Any], List[Any], Any]:
-        result = await self.__query(query=query, parameters=parameters, is_serialized=True)
+    async def select(self, query: str, parameters: Dict[str, Any] = {}, is_values_list: bool = False, is_first: bool = False,
+                     result_format: str = 'dict', query_name: Optional[str] = None,
+                     is_primary: bool = False) -> Union[Dict[str, Any], List[Any], Any]:
+        result = await self.__query(query=query, parameters=parameters, is_serialized=not is_values_list,
+                                    result_format=result_format, query_name=query_name, is_replica=not is_primary)
+        if result_format in ('tuples', 'columns') and not is_values_list:
+            return result
         return self.format_result(result=result, is_values_list=is_values_list, is_first=is_first)
 
 
 
+    async def execute(self, query: str, parameters: Optional[Dict[str, Any]] = None, is_values_list: bool = False,
+                      is_first: bool = False, query_name: Optional[str] = None) -> Union[Dict[str, Any], List[Any], Any]:
+        result = await self.__query(query=query, parameters=parameters, is_commit=True, query_name=query_name)
+        return self.format_result(result=result, is_values_list=is_values_list, is_first=is_first)
+
+
+
+    async def stream(self, query: str, parameters: Optional[Dict[str, Any]] = None, batch_size: Optional[int] = None,
+                     is_values_list: bool = False, is_primary: bool = False) -> AsyncIterator[Any]:
+        parameters = dict(parameters or {})
+        self.parse_list_to_tuple(parameters)
+        statement = statement_cache.get_or_build(('query', query), lambda: query)
+        yield_per = batch_size or settings.STREAM_BATCH_SIZE
+
+        async with session_factory(is_replica=not is_primary, user_id=self.user_id)() as session:
+            result = await session.stream(statement, parameters, execution_options={'yield_per': yield_per})
+            if not is_values_list:
+                result = result.mappings()
+
+            async for partition in result.partitions(yield_per):
+                if is_values_list:
+                    rows = [row[0] if len(row) == 1 else tuple(row) for row in partition]
+                else:
+                    rows = [dict(row) for row in partition]
+
+                if batch_size:
+                    yield rows
+                else:
+                    for row in rows:
+                        yield row
+
+
+
     def __build_log(self, dict_object: Dict[str, Any], log_type: str) -> Dict[str, Any]:
         mapper_dict = {
             'save': 'updated_at',
@@ -87,10 +202,14 @@ class SQLQueryAsync:
 
 
         dict_update = self.__build_log(dict_update, 'update' if not is_disable else 'delete')
-        update = ','.join([f'{column} = :{column}' for column in dict_update.keys()])
+        filter_shape = tuple((k, isinstance(v, list)) for k, v in dict_filter.items())
 
-        where = ' AND '.join([f"{k} IN :{k}" if isinstance(v, list) else f"{k} = :{k}" for k, v in dict_filter.items()])
-        query = f'UPDATE {table_name} SET {update} WHERE {where} RETURNING {pk_name};'
+        def build() -> str:
+            update = ','.join([f'{column} = :{column}' for column in dict_update.keys()])
+            where = ' AND '.join([f"{k} IN :{k}" if is_list else f"{k} = :{k}" for k, is_list in filter_shape])
+            return f'UPDATE {table_name} SET {update} WHERE {where} RETURNING {pk_name};'
+
+        query = statement_cache.get_or_build(('update', table_name, tuple(dict_update), filter_shape, pk_name), build)
         dict_update.update(dict_filter)
 
         result = await self.__query(query=query, parameters=dict_update, is_commit=True)
@@ -105,20 +224,83 @@ class SQLQueryAsync:
                   is_first: bool = True) -> Union[Dict[str, Any], List[Any], Any]:
         returning = returning or pk_name
         dict_save = self.__build_log(dict_save, log_type='save')
-        columns = ','.join(dict_save.keys())
-        values = ','.join([f':{k}' for k in dict_save])
-        update = ','.join([f'{k} = :{k}' for k in dict_save])
-
-        query = f"""
-            INSERT INTO {table_name}({columns}) VALUES ({values})
-            ON CONFLICT ({pk_name}) DO UPDATE SET {update}
-            RETURNING {returning};
-        """
+
+        def build() -> str:
+            columns = ','.join(dict_save.keys())
+            values = ','.join([f':{k}' for k in dict_save])
+            update = ','.join([f'{k} = :{k}' for k in dict_save])
+            return f"""
+                INSERT INTO {table_name}({columns}) VALUES ({values})
+                ON CONFLICT ({pk_name}) DO UPDATE SET {update}
+                RETURNING {returning};
+            """
+
+        query = statement_cache.get_or_build(('save', table_name, tuple(dict_save), pk_name, returning), build)
         result = await self.__query(query=query, parameters=dict_save, is_commit=True)
         return self.format_result(result=result, is_values_list=is_values_list, is_first=is_first)
 
 
 
+    async def get_column_types(self, table_name: str) -> Dict[str, str]:
+        column_types = column_types_cache.get(table_name)
+        if column_types is None:
+            rows = await self.select("""
+                SELECT attname, format_type(atttypid, NULL)
+                FROM pg_attribute
+                WHERE attrelid = CAST(:table_name AS regclass) AND attnum > 0 AND NOT attisdropped
+            """, parameters={'table_name': table_name}, is_values_list=True, query_name='sql.column_types',
+                                     is_primary=True)
+            column_types = dict(rows)
+            column_types_cache.set(table_name, column_types)
+        return column_types
+
+
+
+    async def save_many(self, table_name: str, list_dict_save: List[Dict[str, Any]], pk_name: str = 'id',
+                        conflict_columns: Optional[List[str]] = None, returning: Optional[str] = None,
+                        is_values_list: bool = True) -> List[Any]:
+        if not list_dict_save:
+            return []
+        returning = returning or pk_name
+        conflict_columns = tuple(conflict_columns or [pk_name])
+        column_types = await self.get_column_types(table_name)
+
+        groups: Dict[tuple, Dict[tuple, Dict[str, Any]]] = {}
+        for dict_save in list_dict_save:
+            dict_save = self.__build_log(dict_save, log_type='save')
+            conflict_key = tuple(dict_save.get(k) for k in conflict_columns)
+            if None in conflict_key:
+                # NULL never conflicts, so each such row needs a key no real row can share.
+                conflict_key = (object(),)
+            groups.setdefault(tuple(dict_save), {})[conflict_key] = dict_save
+
+        result = []
+        async with unit_of_work():
+            for list_columns, rows in groups.items():
+                parameters = {f'{k}_array': [row[k] for row in rows.values()] for k in list_columns}
+
+                def build() -> str:
+                    arrays = ','.join([f'CAST(:{k}_array AS {column_types[k]}[])' for k in list_columns])
+                    update = [f'{k} = EXCLUDED.{k}' for k in list_columns
+                              if k not in conflict_columns and k != 'created_at'
+                              and not (k == 'updated_at' and 'created_at' in list_columns)]
+                    if 'created_at' in list_columns:
+                        update.append('updated_at = EXCLUDED.created_at')
+                    return f"""
+                        INSERT INTO {table_name}({','.join(list_columns)})
+                        SELECT * FROM unnest({arrays})
+                        ON CONFLICT ({','.join(conflict_columns)}) DO UPDATE SET {','.join(update)}
+                        RETURNING {returning};
+                    """
+
+                query = statement_cache.get_or_build(('save_many', table_name, list_columns, conflict_columns,
+                                                      returning), build)
+                result += await self.__query(query=query, parameters=parameters, is_commit=True) or []
+
+        return self.format_result(result=result, is_values_list=is_values_list)
+
+
+
     async def insert(self, table_name: str, dict_insert: Dict[str, Any], pk_name: str = 'id', 
                     is_values_list: bool = True, is_first: bool = True, 
                     returning: Optional[str] = None) -> Union[Dict[str, Any], List[Any], Any]:
@@ -126,39 +308,76 @@ class SQLQueryAsync:
             return None
         returning = returning or pk_name
         dict_insert = self.__build_log(dict_insert, log_type='insert')
-        columns = ','.join(dict_insert.keys())
-        values = ','.join([f":{k}" for k in dict_insert])
 
-        query = f"INSERT INTO {table_name} ({columns}) VALUES ({values}) RETURNING {returning}"
+        def build() -> str:
+            columns = ','.join(dict_insert.keys())
+            values = ','.join([f":{k}" for k in dict_insert])
+            return f"INSERT INTO {table_name} ({columns}) VALUES ({values}) RETURNING {returning}"
+
+        query = statement_cache.get_or_build(('insert', table_name, tuple(dict_insert), returning), build)
         result = await self.__query(query=query, parameters=dict_insert, is_commit=True)
         return self.format_result(result=result, is_values_list=is_values_list, is_first=is_first)
 
 
     async def bulk_insert(self, table_name: str, list_dict_insert: List[Dict[str, Any]],
                          pk_name: str = 'id', is_values_list: bool = True, 
-                         is_first: bool = False, returning: Optional[str] = None) -> Union[Dict[str, Any], List[Any], Any]:
+                         is_first: bool = False, returning: Optional[str] = None,
+                         chunk_size: Optional[int] = None) -> Union[Dict[str, Any], List[Any], Any]:
         if not list_dict_insert:
             return None
         returning = returning or pk_name
 
-        columns = ''
-        values = ''
-        parameters = {}
+        list_dict_insert = [self.__build_log(dict_insert, 'insert') for dict_insert in list_dict_insert]
+        list_columns = tuple(list_dict_insert[0].keys())
+        chunk_size = chunk_size or settings.BULK_INSERT_CHUNK_SIZE
+        column_types = await self.get_column_types(table_name)
+
+        def build() -> str:
+            arrays = ','.join([f'CAST(:{k}_array AS {column_types[k]}[])' for k in list_columns])
+            return f"""
+                INSERT INTO {table_name}({','.join(list_columns)})
+                SELECT {','.join(list_columns)}
+                FROM unnest({arrays}) WITH ORDINALITY AS t({','.join(list_columns)}, ordinality)
+                ORDER BY ordinality
+                RETURNING {returning};
+            """
+
+        query = statement_cache.get_or_build(('bulk_insert', table_name, list_columns, returning), build)
+
+        result = []
+        async with unit_of_work():
+            for start in range(0, len(list_dict_insert), chunk_size):
+                chunk = list_dict_insert[start:start + chunk_size]
+                parameters = {f'{k}_array': [dict_insert[k] for dict_insert in chunk] for k in list_columns}
+                result += await self.__query(query=query, parameters=parameters, is_commit=True) or []
 
-        for count, dict_insert in enumerate(list_dict_insert):
-            dict_insert = self.__build_log(dict_insert, 'insert')
-            if not columns:
-                columns = ','.join(dict_insert.keys())
+        return self.format_result(result=result, is_values_list=is_values_list, is_first=is_first)
 
-            values_name = ','.join([f":{k}_{count}" for k in dict_insert])
-            for k, v in dict_insert.items():
-                parameters[f"{k}_{count}"] = v
-            values += f"({values_name}),"
-        values = values.rstrip(',')
 
-        query = f'INSERT INTO {table_name}({columns}) VALUES {values} RETURNING {returning};'
-        result = await self.__query(query=query, parameters=parameters, is_commit=True)
-        return self.format_result(result=result, is_values_list=is_values_list, is_first=is_first)
+    async def bulk_copy(self, table_name: str, list_dict_insert: Iterable[Dict[str, Any]],
+                        columns: Optional[List[str]] = None) -> int:
+        iterator = iter(list_dict_insert)
+        first = next(iterator, None)
+        if first is None:
+            return 0
+
+        first = self.__build_log(first, 'insert')
+        list_columns = columns or list(first.keys())
+        count = 0
+
+        def records():
+            nonlocal count
+            for dict_insert in itertools.chain([first], (self.__build_log(d, 'insert') for d in iterator)):
+                count += 1
+                yield tuple(dict_insert.get(k) for k in list_columns)
+
+        async with unit_of_work() as session:
+            connection = await session.connection()
+            await connection.execute(text("SELECT 1"))
+            raw_connection = (await connection.get_raw_connection()).driver_connection
+            await raw_connection.copy_records_to_table(table_name, records=records(), columns=list_columns)
+
+        return count
 
 
     async def disable(self, table_name: str, dict_filter: Dict[str, Any], 
@@ -0,0 +1,277 @@
+import logging
+from typing import List, Optional, Set
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.db.session import engine
+
+logger = logging.getLogger("chronos.migrations")
+
+MIGRATIONS_LOCK_KEY = 7_461_803
+BACKFILL_BATCH_SIZE = 5000
+
+
+class Migration:
+    def __init__(self, version: int, name: str, statements: List[str], is_concurrent: bool = False,
+                 index_names: Optional[List[str]] = None, backfill: Optional[str] = None):
+        self.version = version
+        self.name = name
+        self.statements = statements
+        self.is_concurrent = is_concurrent
+        self.index_names = index_names or []
+        self.backfill = backfill
+
+
+MIGRATIONS = [
+    Migration(1, "create_base_tables", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            hashed_password VARCHAR(255) NOT NULL,
+            first_name VARCHAR(255),
+            last_name VARCHAR(255),
+            birth_date DATE,
+            monthly_goal FLOAT,
+            daily_goal FLOAT,
+            theme VARCHAR(255),
+            is_first_access BOOLEAN DEFAULT TRUE,
+            status BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            deleted_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            week_day_list jsonb,
+            language VARCHAR(255)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS projects (
+            id SERIAL PRIMARY KEY,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            deleted_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            name VARCHAR(200),
+            status BOOLEAN,
+            user_id INTEGER REFERENCES users(id) ON DELETE NO ACTION
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS entries (
+            id SERIAL PRIMARY KEY,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            deleted_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            title VARCHAR(200),
+            description TEXT,
+            duration INTEGER,
+            datm_start TIMESTAMP,
+            datm_end TIMESTAMP,
+            datm_interval_start TIMESTAMPTZ,
+            datm_interval_end TIMESTAMPTZ,
+            status BOOLEAN,
+            date DATE,
+            project_id INTEGER REFERENCES projects(id) ON DELETE NO ACTION,
+            user_id INTEGER REFERENCES users(id) ON DELETE NO ACTION
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);",
+    ]),
+    Migration(2, "add_users_token_version", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;",
+    ]),
+    Migration(3, "create_user_entry_counters", [
+        """
+        CREATE TABLE IF NOT EXISTS user_entry_counters (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+            active_entries BIGINT NOT NULL DEFAULT 0
+        );
+        """,
+        """
+        INSERT INTO user_entry_counters (user_id, active_entries)
+        SELECT user_id, count(*)
+        FROM entries
+        WHERE status = true AND user_id IS NOT NULL
+        GROUP BY user_id
+        ON CONFLICT (user_id) DO NOTHING;
+        """,
+    ]),
+    Migration(4, "add_entries_search_vector", [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+        "ALTER TABLE entries ADD COLUMN IF NOT EXISTS search_vector tsvector;",
+        """
+        CREATE OR REPLACE FUNCTION entries_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('simple', coalesce(NEW.title, '') || ' ' || coalesce(NEW.description, ''));
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS entries_search_vector_update ON entries;",
+        """
+        CREATE TRIGGER entries_search_vector_update
+            BEFORE INSERT OR UPDATE OF title, description ON entries
+            FOR EACH ROW EXECUTE FUNCTION entries_search_vector_update();
+        """,
+    ], backfill=f"""
+        UPDATE entries
+        SET search_vector = to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))
+        WHERE id IN (
+            SELECT id FROM entries
+            WHERE search_vector IS NULL
+            ORDER BY id
+            LIMIT {BACKFILL_BATCH_SIZE}
+        );
+    """),
+    Migration(5, "create_entries_search_indexes", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_entries_search_vector ON entries USING GIN (search_vector);",
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_entries_search_trgm ON entries
+            USING GIN ((lower(coalesce(title, '') || ' ' || coalesce(description, ''))) gin_trgm_ops);
+        """,
+    ], is_concurrent=True, index_names=["idx_entries_search_vector", "idx_entries_search_trgm"]),
+    Migration(6, "create_entry_daily_rollups", [
+        """
+        CREATE TABLE IF NOT EXISTS entry_daily_rollups (
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            date DATE NOT NULL,
+            total_duration BIGINT NOT NULL DEFAULT 0,
+            entry_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, date)
+        );
+        """,
+        """
+        INSERT INTO entry_daily_rollups (user_id, date, total_duration, entry_count)
+        SELECT user_id, date, coalesce(sum(duration), 0), count(*)
+        FROM entries
+        WHERE status = true AND user_id IS NOT NULL AND date IS NOT NULL
+        GROUP BY user_id, date
+        ON CONFLICT (user_id, date) DO NOTHING;
+        """,
+    ]),
+    Migration(7, "create_user_activity_bitmaps", [
+        """
+        CREATE TABLE IF NOT EXISTS user_activity_bitmaps (
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            year INTEGER NOT NULL,
+            days BYTEA NOT NULL,
+            PRIMARY KEY (user_id, year)
+        );
+        """,
+        """
+        INSERT INTO user_activity_bitmaps (user_id, year, days)
+        WITH active_days AS (
+            SELECT user_id, extract(year FROM date)::int AS year, extract(doy FROM date)::int - 1 AS day
+            FROM entry_daily_rollups
+            WHERE entry_count > 0
+        ),
+        active_bytes AS (
+            SELECT user_id, year, day / 8 AS byte, sum(1 << (day % 8)) AS value
+            FROM active_days
+            GROUP BY user_id, year, day / 8
+        ),
+        bitmap_keys AS (
+            SELECT DISTINCT user_id, year FROM active_days
+        )
+        SELECT k.user_id,
+               k.year,
+               decode(string_agg(lpad(to_hex(coalesce(b.value, 0)), 2, '0'), '' ORDER BY s.byte), 'hex')
+        FROM bitmap_keys k
+            CROSS JOIN generate_series(0, 45) AS s(byte)
+            LEFT JOIN active_bytes b
+                ON b.user_id = k.user_id
+                   AND b.year = k.year
+                   AND b.byte = s.byte
+        GROUP BY k.user_id, k.year
+        ON CONFLICT (user_id, year) DO NOTHING;
+        """,
+    ]),
+    Migration(8, "create_entries_and_projects_user_indexes", [
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_entries_user_date_active
+            ON entries (user_id, date DESC, id DESC) WHERE status;
+        """,
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_projects_user_id ON projects (user_id);",
+    ], is_concurrent=True, index_names=["idx_entries_user_date_active", "idx_projects_user_id"]),
+    Migration(9, "drop_user_entry_counters", [
+        "DROP TABLE IF EXISTS user_entry_counters;",
+    ]),
+]
+
+
+async def applied_versions(conn) -> Set[int]:
+    await conn.execute(text("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    );
+    """))
+    result = await conn.execute(text("SELECT version FROM schema_migrations"))
+    return {row[0] for row in result}
+
+
+async def drop_invalid_indexes(conn, index_names: List[str]) -> None:
+    if not index_names:
+        return
+
+    result = await conn.execute(text("""
+    SELECT c.relname
+    FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE NOT i.indisvalid
+          AND n.nspname = current_schema()
+          AND c.relname = any(CAST(:index_names AS text[]))
+    """), dict(index_names=index_names))
+    for index_name, in result.all():
+        logger.warning("Dropping invalid index %s left by an interrupted migration", index_name)
+        await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"'))
+
+
+async def apply_migration(migration: Migration, db_engine: AsyncEngine) -> None:
+    record = text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)")
+    parameters = dict(version=migration.version, name=migration.name)
+
+    if migration.is_concurrent:
+        async with db_engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await drop_invalid_indexes(conn, migration.index_names)
+            for statement in migration.statements:
+                await conn.execute(text(statement))
+            await conn.execute(record, parameters)
+        return
+
+    async with db_engine.begin() as conn:
+        for statement in migration.statements:
+            await conn.execute(text(statement))
+        if migration.backfill is None:
+            await conn.execute(record, parameters)
+            return
+
+    # Each batch commits on its own so the backfill never holds row locks on the whole table.
+    async with db_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        while True:
+            result = await conn.execute(text(migration.backfill))
+            if not result.rowcount:
+                break
+            logger.info("Backfilled %s rows for migration %s", result.rowcount, migration.version)
+        await conn.execute(record, parameters)
+
+
+async def migrate(db_engine: AsyncEngine = engine, target: Optional[int] = None) -> List[int]:
+    applied = []
+    async with db_engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        await lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), dict(key=MIGRATIONS_LOCK_KEY))
+        try:
+            done = await applied_versions(lock_conn)
+            for migration in sorted(MIGRATIONS, key=lambda migration: migration.version):
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+                logger.info("Applying migration %s %s", migration.version, migration.name)
+                await apply_migration(migration, db_engine)
+                applied.append(migration.version)
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), dict(key=MIGRATIONS_LOCK_KEY))
+
+    return applied
@@ -0,0 +1,114 @@
+import hashlib
+import hmac
+import time
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, ReplicaSessionLocal, replica_engine
+
+
+class PrimaryPins:
+    def __init__(self, window_seconds: float, max_users: int = 10000):
+        self.window_seconds = window_seconds
+        self.max_users = max_users
+        self.__pins: Dict[Any, float] = {}
+
+    def pin(self, user_id: Any) -> None:
+        if user_id is None or not self.window_seconds:
+            return
+
+        now = time.monotonic()
+        self.__pins[user_id] = now + self.window_seconds
+        if len(self.__pins) > self.max_users:
+            self.__pins = {k: v for k, v in self.__pins.items() if v > now}
+
+    def is_pinned(self, user_id: Any) -> bool:
+        expires_at = self.__pins.get(user_id)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            'window_seconds': self.window_seconds,
+            'pinned_users': sum(1 for v in self.__pins.values() if v > now),
+        }
+
+
+primary_pins = PrimaryPins(window_seconds=settings.READ_YOUR_WRITES_SECONDS)
+
+replica_reads = {'replica': 0, 'primary': 0}
+
+force_primary: ContextVar[bool] = ContextVar('force_primary', default=False)
+request_writes: ContextVar[Optional[Dict[str, bool]]] = ContextVar('request_writes', default=None)
+
+PRIMARY_PIN_COOKIE = "chronos_primary_until"
+PRIMARY_PIN_HEADER = "X-Primary-Until"
+
+
+def sign_primary_pin(expires_at: int) -> str:
+    signature = hmac.new(str(settings.SECRET_KEY).encode(), f"primary:{expires_at}".encode(), hashlib.sha256)
+    return f"{expires_at}.{signature.hexdigest()[:32]}"
+
+
+def is_primary_pin_valid(value: Optional[str]) -> bool:
+    if not value or not settings.SECRET_KEY:
+        return False
+    expires_at, _, _ = value.partition(".")
+    if not expires_at.isdigit() or int(expires_at) <= time.time():
+        return False
+    return hmac.compare_digest(value, sign_primary_pin(int(expires_at)))
+
+
+def mark_written(user_id: Any) -> None:
+    primary_pins.pin(user_id)
+    writes = request_writes.get()
+    if writes is not None:
+        writes['is_written'] = True
+
+
+def session_factory(is_replica: bool = False, user_id: Optional[Any] = None):
+    if is_replica and replica_engine is not None and not force_primary.get() and not primary_pins.is_pinned(user_id):
+        replica_reads['replica'] += 1
+        return ReplicaSessionLocal
+
+    if is_replica:
+        replica_reads['primary'] += 1
+    return AsyncSessionLocal
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not settings.READ_YOUR_WRITES_SECONDS or not settings.SECRET_KEY:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+        cookie = SimpleCookie(headers.get('cookie', '')).get(PRIMARY_PIN_COOKIE)
+        # Workers do not share pins, so the client carries a signed expiry back on every request.
+        if is_primary_pin_valid(headers.get(PRIMARY_PIN_HEADER.lower())) or \
+                is_primary_pin_valid(cookie.value if cookie else None):
+            force_primary.set(True)
+
+        writes = {'is_written': False}
+        token = request_writes.set(writes)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start' and writes['is_written']:
+                seconds = settings.READ_YOUR_WRITES_SECONDS
+                pin = sign_primary_pin(int(time.time()) + seconds)
+                message['headers'] = [
+                    *message.get('headers', []),
+                    (PRIMARY_PIN_HEADER.lower().encode(), pin.encode()),
+                    (b'set-cookie', f"{PRIMARY_PIN_COOKIE}={pin}; Max-Age={seconds}; Path=/; "
+                                    f"HttpOnly; Secure; SameSite=None".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_writes.reset(token)
@@ -1,18 +1,66 @@
-
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+logger = logging.getLogger(__name__)
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    future=True,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=30,
-)
+
+def async_url(url: str) -> str:
+    return url.replace("postgresql://", "postgresql+asyncpg://")
+
+
+def build_engine(url: str) -> AsyncEngine:
+    connect_args = {
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        "timeout": settings.DB_CONNECT_TIMEOUT,
+    }
+    if settings.DB_COMMAND_TIMEOUT:
+        connect_args["command_timeout"] = settings.DB_COMMAND_TIMEOUT
+
+    return create_async_engine(
+        async_url(url),
+        echo=settings.DB_ECHO,
+        future=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        connect_args=connect_args,
+    )
+
+
+class PoolWaitStats:
+    def __init__(self):
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'checkouts': self.count,
+            'avg_wait_ms': round(self.total_wait / self.count * 1000, 3) if self.count else None,
+            'max_wait_ms': round(self.max_wait * 1000, 3),
+        }
+
+
+DATABASE_URL = async_url(settings.DATABASE_URL)
+
+engine = build_engine(settings.DATABASE_URL)
+replica_engine = build_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+
+pool_wait = PoolWaitStats()
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -20,6 +68,73 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+ReplicaSessionLocal = sessionmaker(
+    bind=replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+) if replica_engine is not None else AsyncSessionLocal
+
+
+def pool_status(db_engine: AsyncEngine) -> Dict[str, Any]:
+    pool = db_engine.pool
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'timeout': pool.timeout(),
+    }
+
+
+def pool_stats() -> Dict[str, Any]:
+    stats = {'primary': pool_status(engine), 'wait': pool_wait.stats()}
+    if replica_engine is not None:
+        stats['replica'] = pool_status(replica_engine)
+    return stats
+
+
+async def warm_up(db_engine: AsyncEngine, connections: int) -> int:
+    connections = min(connections, settings.DB_POOL_SIZE)
+    if connections <= 0:
+        return 0
+
+    async def open_connection():
+        connection = await db_engine.connect().start()
+        await connection.execute(text("SELECT 1"))
+        return connection
+
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*[open_connection() for _ in range(connections)], return_exceptions=True)
+    opened = [connection for connection in results if not isinstance(connection, BaseException)]
+    for connection in opened:
+        await connection.close()
+
+    errors = [error for error in results if isinstance(error, BaseException)]
+    if errors:
+        logger.warning("Pool warm-up opened %s of %s connections: %r", len(opened), connections, errors[0])
+    else:
+        logger.info("Pool warm-up opened %s connections in %.1f ms", len(opened),
+                    (time.perf_counter() - started_at) * 1000)
+    return len(opened)
+
+
+async def check_database(timeout: float) -> Dict[str, Any]:
+    started_at = time.perf_counter()
+
+    async def ping():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.wait_for(ping(), timeout=timeout)
+    return {'latency_ms': round((time.perf_counter() - started_at) * 1000, 3)}
+
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
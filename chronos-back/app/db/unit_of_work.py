@@ -0,0 +1,87 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import AsyncSessionLocal
+
+current_session: ContextVar[Optional[AsyncSession]] = ContextVar('current_session', default=None)
+
+
+def after_commit(callback: Callable[[], None]) -> None:
+    session = current_session.get()
+    if session is None:
+        callback()
+    else:
+        session.info.setdefault('after_commit', []).append(callback)
+
+
+def run_after_commit(session: AsyncSession, is_committed: bool) -> None:
+    callbacks = session.info.pop('after_commit', [])
+    if is_committed:
+        for callback in callbacks:
+            callback()
+
+
+@asynccontextmanager
+async def detached() -> AsyncIterator[None]:
+    token = current_session.set(None)
+    try:
+        yield
+    finally:
+        current_session.reset(token)
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[AsyncSession]:
+    session = current_session.get()
+    if session is not None:
+        yield session
+        return
+
+    async with AsyncSessionLocal() as session:
+        token = current_session.set(session)
+        try:
+            yield session
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            run_after_commit(session, is_committed=False)
+            raise
+        finally:
+            current_session.reset(token)
+        run_after_commit(session, is_committed=True)
+
+
+class UnitOfWorkMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        async with AsyncSessionLocal() as session:
+            token = current_session.set(session)
+            is_finished = False
+
+            async def send_wrapper(message):
+                nonlocal is_finished
+                if message['type'] == 'http.response.start' and not is_finished:
+                    is_finished = True
+                    if message['status'] < 400:
+                        await session.commit()
+                        run_after_commit(session, is_committed=True)
+                    else:
+                        await session.rollback()
+                        run_after_commit(session, is_committed=False)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except BaseException:
+                await session.rollback()
+                run_after_commit(session, is_committed=False)
+                raise
+            finally:
+                current_session.reset(token)
@@ -1,23 +1,65 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Query
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.api import api_router
+from app.api.endpoints.auth import ip_limiter, username_limiter
+from app.core.auth import require_internal_token
+from app.core.hashing import hash_pool
+from app.core.config import settings
+from app.core.events import event_bus, event_listener, events_backend
+from app.core.query_stats import query_stats
+from app.core.sql_async import statement_cache
+from app.db.routing import PRIMARY_PIN_HEADER, ReadYourWritesMiddleware, primary_pins, replica_reads
+from app.db.session import check_database, dispose_engines, engine, pool_stats, replica_engine, warm_up
+from app.db.unit_of_work import UnitOfWorkMiddleware
+from app.services.auth import token_cache, token_versions, user_cache, user_email_index
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
 
 
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger("chronos")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up(engine, settings.DB_POOL_WARMUP)
+    if replica_engine is not None:
+        await warm_up(replica_engine, settings.DB_POOL_WARMUP)
+    if events_backend() == 'postgres':
+        await event_listener.start(engine)
+    elif settings.WEB_CONCURRENCY > 1:
+        logger.warning("EVENTS_BACKEND is local with %s workers: changes made on one worker will not reach "
+                       "dashboard streams or ETags served by the others", settings.WEB_CONCURRENCY)
+
+    yield
+
+    await event_listener.stop()
+    hash_pool.shutdown()
+    await dispose_engines()
 
 
 app = FastAPI(
     title="Chronos Backend",
     description="Backend API for Chronos",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+if settings.REQUEST_UNIT_OF_WORK:
+    app.add_middleware(UnitOfWorkMiddleware)
+
+if settings.DATABASE_REPLICA_URL:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://chronos-jfs.netlify.app"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[PRIMARY_PIN_HEADER],
 )
 
 app.include_router(api_router, prefix="/api")
@@ -30,3 +72,34 @@ async def health_check():
     return {"status": "healthy", "service": "chronos-backend"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    try:
+        await check_database(timeout=settings.READINESS_TIMEOUT_SECONDS)
+    except Exception:
+        logger.warning("Readiness check failed", exc_info=True)
+        return JSONResponse(status_code=503, content={"status": "unavailable", "service": "chronos-backend"})
+
+    return {"status": "ready", "service": "chronos-backend"}
+
+
+@app.get("/metrics", dependencies=[Depends(require_internal_token)])
+async def metrics():
+    return {
+        "user_cache": user_cache.stats(),
+        "user_email_index": user_email_index.stats(),
+        "token_cache": token_cache.stats(),
+        "token_versions": token_versions.stats(),
+        "hash_pool": hash_pool.stats(),
+        "auth_ip_limiter": ip_limiter.stats(),
+        "auth_username_limiter": username_limiter.stats(),
+        "statement_cache": statement_cache.stats(),
+        "read_routing": {**primary_pins.stats(), **replica_reads},
+        "pool": pool_stats(),
+        "events": {**event_bus.stats(), **event_listener.stats()},
+    }
+
+
+@app.get("/metrics/queries", dependencies=[Depends(require_internal_token)])
+async def query_metrics(name: str = Query(None)):
+    return query_stats.stats(name)
@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from app.core.config import settings
 from .base import DateTimeRangeSchema
 
 
@@ -15,4 +16,8 @@ class EntriesSchema(DateTimeRangeSchema):
     datm_interval_start: Optional[str] = None
     datm_interval_end: Optional[str] = None
     date: str
-    project_id: int
\ No newline at end of file
+    project_id: int
+
+
+class EntriesBatchSchema(BaseModel):
+    entries: List[EntriesSchema] = Field(..., min_length=1, max_length=settings.ENTRIES_BATCH_MAX_SIZE)
@@ -1,14 +1,86 @@
+import asyncio
+import hashlib
 import json
-from passlib.context import CryptContext
+import sys
+import time
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
+from app.core.cache import TTLCache
+from app.core.hashing import hash_pool, hash_password, verify_password
 from app.core.sql_async import SQLQueryAsync
 from app.schemas.auth import UserCreate
 from app.core.config import settings
+from app.db.unit_of_work import after_commit
 from app.services.decorator import Response
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def claims_size(digest: bytes, claims: dict) -> int:
+    return sys.getsizeof(digest) + sys.getsizeof(claims) + sum(sys.getsizeof(k) + sys.getsizeof(v)
+                                                               for k, v in claims.items())
+
+
+user_cache = TTLCache(max_size=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+user_email_index = TTLCache(max_size=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+token_cache = TTLCache(max_size=settings.TOKEN_CACHE_MAX_SIZE, size_of=claims_size)
+
+
+class TokenVersionMap:
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self.versions: Dict[int, int] = {}
+        self.inactive_users: set = set()
+        self.refreshed_at: Optional[float] = None
+        self.refresh_count = 0
+        self.__lock: Optional[asyncio.Lock] = None
+
+    @property
+    def is_stale(self) -> bool:
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at >= self.refresh_seconds
+
+    async def refresh(self) -> None:
+        rows = await SQLQueryAsync().select("""
+            SELECT id, token_version, status is true
+            FROM users
+            WHERE token_version > 0 OR status IS NOT TRUE
+        """, is_values_list=True, query_name="auth.refresh_token_versions", is_primary=True)
+
+        self.versions = {user_id: token_version for user_id, token_version, _ in rows}
+        self.inactive_users = {user_id for user_id, _, is_active in rows if not is_active}
+        self.refreshed_at = time.monotonic()
+        self.refresh_count += 1
+
+    async def ensure_fresh(self) -> None:
+        if not self.is_stale:
+            return
+
+        if self.__lock is None:
+            self.__lock = asyncio.Lock()
+
+        async with self.__lock:
+            if self.is_stale:
+                await self.refresh()
+
+    def bump(self, user_id: int, token_version: int) -> None:
+        self.versions[user_id] = max(token_version, self.versions.get(user_id, 0))
+
+    async def is_valid(self, user_id: int, token_version: int) -> bool:
+        await self.ensure_fresh()
+        if user_id in self.inactive_users:
+            return False
+        return token_version >= self.versions.get(user_id, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tracked_users': len(self.versions),
+            'inactive_users': len(self.inactive_users),
+            'refresh_seconds': self.refresh_seconds,
+            'refresh_count': self.refresh_count,
+            'age_seconds': round(time.monotonic() - self.refreshed_at, 2) if self.refreshed_at else None,
+        }
+
+
+token_versions = TokenVersionMap(refresh_seconds=settings.TOKEN_VERSION_REFRESH_SECONDS)
 
 
 class AuthService(SQLQueryAsync):
@@ -17,12 +89,26 @@ class AuthService(SQLQueryAsync):
         pass
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+        return verify_password(plain_password, hashed_password)
 
     def get_password_hash(self, password: str) -> str:
-        return pwd_context.hash(password)
+        return hash_password(password)
+
+    @staticmethod
+    def cache_user(user: dict) -> None:
+        user_cache.set(user['id'], user)
+        user_email_index.set(user['email'], user['id'])
+
+    @staticmethod
+    def invalidate_user(user_id: int) -> None:
+        user_cache.pop(user_id)
 
     async def get_user_by_email(self, email: str) -> Optional[dict]:
+        user_id = user_email_index.get(email)
+        cached_user = user_cache.get(user_id) if user_id is not None else None
+        if cached_user is not None and cached_user['email'] == email:
+            return dict(cached_user)
+
         query = """
             SELECT id, 
                    email, 
@@ -38,7 +124,8 @@ class AuthService(SQLQueryAsync):
                    daily_goal,
                    week_day_list,
                    theme,
-                   users.language
+                   users.language,
+                   token_version
             FROM users 
             WHERE email = :email AND status = true
         """
@@ -46,12 +133,22 @@ class AuthService(SQLQueryAsync):
         result = await self.select(
             query=query,
             parameters={"email": email},
-            is_first=True
+            is_first=True,
+            query_name="auth.get_user_by_email",
+            is_primary=True
         )
-        
-        return result if result else None
+
+        if not result:
+            return None
+
+        self.cache_user(result)
+        return dict(result)
 
     async def get_user_by_id(self, user_id: int) -> Optional[dict]:
+        cached_user = user_cache.get(user_id)
+        if cached_user is not None:
+            return dict(cached_user)
+
         query = """
             SELECT id, email, hashed_password, first_name, last_name, status,  created_at, updated_at
             FROM users 
@@ -61,7 +158,9 @@ class AuthService(SQLQueryAsync):
         result = await self.select(
             query=query,
             parameters={"user_id": user_id},
-            is_first=True
+            is_first=True,
+            query_name="auth.get_user_by_id",
+            is_primary=True
         )
         
         return result if result else None
@@ -70,7 +169,7 @@ class AuthService(SQLQueryAsync):
         user = await self.get_user_by_email(email)
         if not user:
             return None
-        if not self.verify_password(password, user["hashed_password"]):
+        if not await hash_pool.verify(password, user["hashed_password"]):
             return None
         return user
 
@@ -80,7 +179,7 @@ class AuthService(SQLQueryAsync):
         if existing_user:
             raise ValueError("Email já registrado")
 
-        hashed_password = self.get_password_hash(user_data.password)
+        hashed_password = await hash_pool.hash(user_data.password)
         user_dict = {
             "email": user_data.email,
             "hashed_password": hashed_password,
@@ -107,16 +206,46 @@ class AuthService(SQLQueryAsync):
         encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
         return encoded_jwt
 
-    def verify_token(self, token: str) -> Optional[str]:
+    def decode_token(self, token: str) -> Optional[dict]:
+        digest = hashlib.sha256(token.encode()).digest()
+        claims = token_cache.get(digest)
+        if claims is not None:
+            return dict(claims)
+
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            email: str = payload.get("email")
-            if email is None:
-                return None
-            return email
         except JWTError:
             return None
 
+        expires_in = payload.get("exp", 0) - time.time()
+        if expires_in > 0:
+            token_cache.set(digest, payload, ttl=expires_in)
+
+        return dict(payload)
+
+    @staticmethod
+    def token_claims(user: dict) -> dict:
+        return {
+            "user_id": user["id"],
+            "token_version": user["token_version"],
+            "email": user["email"],
+            "birth_date": str(user["birth_date"]),
+            "first_name": user["first_name"],
+            "last_name": user["last_name"],
+            "is_first_access": user["is_first_access"],
+            "monthly_goal": user["monthly_goal"],
+            "daily_goal": user["daily_goal"],
+            "week_days_list": user["week_day_list"],
+            "theme": user["theme"],
+            "language": user["language"]
+        }
+
+    def verify_token(self, token: str) -> Optional[str]:
+        payload = self.decode_token(token)
+        if payload is None:
+            return None
+        return payload.get("email")
+
 
     @Response(desc_error="Error when finishing onboarding.", return_list=[])
     async def finish_onboarding(self, monthly_goal, daily_goal, week_day_list, user_id):
@@ -128,6 +257,7 @@ class AuthService(SQLQueryAsync):
         }
 
         await self.update("users", dict_update=dict_onboarding, dict_filter={"id": user_id})
+        after_commit(lambda: self.invalidate_user(user_id))
 
     @Response(desc_error="Error when updating user.", return_list=[])
     async def patch_user(self, first_name, last_name, week_days_list, theme, daily_goal, monthly_goal, user_id, language):
@@ -143,4 +273,18 @@ class AuthService(SQLQueryAsync):
 
         dict_user_patch = {k:v for k, v in dict_user_patch.items() if v not in ('null', None)}
 
-        await self.update("users", dict_update=dict_user_patch, dict_filter={"id": user_id})
\ No newline at end of file
+        await self.update("users", dict_update=dict_user_patch, dict_filter={"id": user_id})
+        after_commit(lambda: self.invalidate_user(user_id))
+
+    @Response(desc_error="Error when revoking tokens.", return_list=["token_version"])
+    async def revoke_tokens(self, user_id):
+        token_version = await self.execute("""
+            UPDATE users SET token_version = token_version + 1, updated_at = :updated_at
+            WHERE id = :user_id
+            RETURNING token_version
+        """, parameters={"user_id": user_id, "updated_at": datetime.utcnow()}, is_first=True, is_values_list=True)
+
+        after_commit(lambda: token_versions.bump(user_id, token_version))
+        after_commit(lambda: self.invalidate_user(user_id))
+
+        return token_version
@@ -1,6 +1,7 @@
 import inspect
 import asyncio
 from typing import Callable
+from app.core.query_stats import query_label
 from .exception import ValidationError
 
 
@@ -19,6 +20,7 @@ class Response:
 
     def __call__(self, method) -> Callable[..., dict]:
         is_async = asyncio.iscoroutinefunction(method)
+        label = f"{method.__module__.rsplit('.', 1)[-1]}.{method.__name__}"
 
         async def async_wrapper(*args, **kwargs):
             response = {
@@ -27,6 +29,7 @@ class Response:
                 'description': self.desc_success,
             }
             result = None
+            token = query_label.set(label)
             try:
                 result = await method(*args, **kwargs)
 
@@ -41,6 +44,9 @@ class Response:
                 response['status_code'] = 500
                 response['description'] = self.desc_error
 
+            finally:
+                query_label.reset(token)
+
             if self.is_keep_result:
                 return result
 
@@ -1,29 +1,99 @@
+import asyncio
+import base64
+import json
+import logging
+import random
+import time
+from datetime import date
+from app.core import day_bitmap
+from app.core.events import event_bus, events_backend
+from app.core.export_formats import EXPORT_FORMATS, EXPORT_WRITERS, load_pyarrow
+from app.core.config import settings
+from app.core.result_formats import format_rows
 from app.core.sql_async import SQLQueryAsync
+from app.db.unit_of_work import after_commit, detached, unit_of_work
 from app.services.decorator import Response
 from app.services.exception import ValidationError
+from app.services.rollups import DailyRollups
 from app.utils.date import str_to_datetime, str_to_date
 
+logger = logging.getLogger("chronos.entries")
+
+dashboard_refreshes = asyncio.Semaphore(settings.SSE_REFRESH_CONCURRENCY)
+export_slots = asyncio.Semaphore(settings.EXPORT_MAX_CONCURRENCY)
+
+EXPORT_COLUMNS = [
+    ('id', 'int64'),
+    ('title', 'string'),
+    ('description', 'string'),
+    ('duration', 'int64'),
+    ('datm_start', 'string'),
+    ('datm_end', 'string'),
+    ('datm_interval_start', 'string'),
+    ('datm_interval_end', 'string'),
+    ('project_name', 'string'),
+    ('entrie_date', 'string'),
+]
+
+
 class Entries(SQLQueryAsync):
     def __init__(self, user_id):
         super().__init__()
         self.user_id = user_id
 
-    @Response(desc_error="Error when fetching entries.", return_list=['entries_list', "total_count"])
-    async def get_entries(self, dat_start, dat_end, limit, offset, require_total_count, search):
-        pagination = f""
+    @staticmethod
+    def encode_cursor(**kwargs):
+        return base64.urlsafe_b64encode(json.dumps(kwargs).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if "offset" in payload:
+                return None, None, int(payload["offset"])
+            return str_to_date(entry_date=payload["date"]), int(payload["id"]), None
+        except (ValueError, TypeError, KeyError, AttributeError):
+            raise ValidationError("Invalid cursor.")
+
+    @staticmethod
+    def search_filter(search):
+        like = search.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        filter = f"""
+              and (e.search_vector @@ websearch_to_tsquery('simple', :search)
+                   or lower(coalesce(e.title, '') || ' ' || coalesce(e.description, '')) like :search_like)"""
+        return filter, f"%{like}%"
+
+    @Response(desc_error="Error when fetching entries.",
+              return_list=['entries_list', "total_count", "next_cursor", "total_count_type"])
+    async def get_entries(self, dat_start, dat_end, limit, offset, require_total_count, search, result_format='dict',
+                          cursor=None, count_mode='exact'):
+        limit = min(limit, settings.ENTRIES_MAX_PAGE_SIZE) if limit else 5
+        offset = offset or 0
         filter = f""
-        if limit:
-            pagination += f"limit {limit if limit <= 10 else 10} offset {offset if offset else 0}"
-        else:
-            pagination += f"limit 5"
+        cursor_filter = f""
+        order_by = f"e.date desc, e.id desc"
+        search_like = None
+        cursor_date, cursor_id, cursor_offset = self.decode_cursor(cursor) if cursor else (None, None, None)
 
         if dat_start and dat_end:
             filter += f"and e.date between :dat_start and :dat_end"
             dat_start, dat_end = str_to_date(dat_start=dat_start, dat_end=dat_end)
 
         if search:
-            search = f"%{search.lower()}%"
-            filter += f" and (lower(e.title) LIKE :search or lower(e.description) LIKE :search)"
+            search_filter, search_like = self.search_filter(search)
+            filter += search_filter
+            order_by = f"ts_rank(e.search_vector, websearch_to_tsquery('simple', :search)) desc, {order_by}"
+
+        if cursor_offset is not None:
+            offset = cursor_offset
+        elif cursor:
+            cursor_filter = f"and (e.date, e.id) < (:cursor_date, :cursor_id)"
+            offset = 0
+
+        parameters = dict(dat_start=dat_start, dat_end=dat_end, user_id=self.user_id, search=search,
+                          search_like=search_like, cursor_date=cursor_date, cursor_id=cursor_id, limit=limit + 1,
+                          offset=offset)
+        is_window_count = require_total_count and count_mode == 'exact' and bool(filter) and not cursor_filter
 
         query = f"""
         select e.id,
@@ -36,34 +106,123 @@ class Entries(SQLQueryAsync):
                e.datm_interval_end::varchar,
                p.name as project_name,
                e.date::varchar as entrie_date
+               {", count(*) over () as total_count" if is_window_count else ""}
         from public.entries e 
             join public.projects p
                 on p.id = e.project_id
         where e.status = true 
               and e.user_id = :user_id
               {filter}
-        order by e.date desc
-        {pagination} 
+              {cursor_filter}
+        order by {order_by}
+        limit :limit offset :offset
         """
 
-        ls_entries = await self.select(query, parameters=dict(dat_start=dat_start, dat_end=dat_end, user_id=self.user_id,
-                                                              search=search))
+        page = await self.select(query, parameters=parameters, result_format='tuples')
+
+        columns, rows = page['columns'], page['rows']
+        total_count, total_count_type = None, None
+        if is_window_count:
+            columns = columns[:-1]
+            if rows:
+                total_count, total_count_type = rows[0][-1], 'exact'
+            elif not offset:
+                total_count, total_count_type = 0, 'exact'
+            rows = [row[:-1] for row in rows]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_entry = dict(zip(columns, rows[-1]))
+            if search:
+                next_cursor = self.encode_cursor(offset=offset + limit)
+            else:
+                next_cursor = self.encode_cursor(date=last_entry['entrie_date'], id=last_entry['id'])
+
+        ls_entries = format_rows(columns, rows, result_format)
+
+        if require_total_count and total_count_type is None:
+            total_count, total_count_type = await self.count_entries(filter, parameters, count_mode)
 
-        if require_total_count:
-            total_count = await self.select(query="""select count(id) 
-                                                     from public.entries 
-                                                     where status = true 
-                                                     and user_id = :user_id""", parameters=dict(user_id=self.user_id),
-                                            is_first=True, is_values_list=True)
+        return ls_entries, total_count, next_cursor, total_count_type
+
+    async def count_entries(self, filter, parameters, count_mode='exact'):
+        query = f"""
+        select count(*)
+        from public.entries e
+        where e.status = true
+              and e.user_id = :user_id
+              {filter}
+        """
+
+        if count_mode == 'estimate':
+            plan = await self.select(f"""
+            explain (format json)
+            select 1
+            from public.entries e
+            where e.status = true
+                  and e.user_id = :user_id
+                  {filter}
+            """, parameters=parameters, is_first=True, is_values_list=True,
+                                     query_name="entries.count_entries.estimate")
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return int(plan[0]['Plan']['Plan Rows']), 'estimate'
+
+        if not filter:
+            total_count = await self.select("""
+            select coalesce(sum(entry_count), 0) from entry_daily_rollups where user_id = :user_id
+            """, parameters=dict(user_id=self.user_id), is_first=True, is_values_list=True,
+                                            query_name="entries.count_entries.counter")
+            return int(total_count), 'counter'
+
+        total_count = await self.select(query, parameters=parameters, is_first=True, is_values_list=True,
+                                        query_name="entries.count_entries")
+        return total_count, 'exact'
+
+    async def publish_change(self):
+        if events_backend() == 'postgres':
+            await self.execute("select pg_notify(:channel, :payload)",
+                               parameters=dict(channel=settings.EVENTS_CHANNEL, payload=str(self.user_id)),
+                               query_name="entries.publish_change")
         else:
-            total_count = None
+            user_id = self.user_id
+            after_commit(lambda: event_bus.publish(user_id))
 
-        return ls_entries, total_count
+    async def stream_entries(self, dat_start=None, dat_end=None, batch_size=None):
+        filter = f""
+        if dat_start:
+            filter += f" and e.date >= :dat_start"
+        if dat_end:
+            filter += f" and e.date <= :dat_end"
 
+        query = f"""
+        select e.id,
+               e.title,
+               e.description,
+               e.duration,
+               e.datm_start::varchar,
+               e.datm_end::varchar,
+               e.datm_interval_start::varchar,
+               e.datm_interval_end::varchar,
+               p.name as project_name,
+               e.date::varchar as entrie_date
+        from public.entries e 
+            join public.projects p
+                on p.id = e.project_id
+        where e.status = true 
+              and e.user_id = :user_id
+              {filter}
+        order by e.date, e.id
+        """
 
-    @Response(desc_error="Error when creating entry.", return_list=["entry_data"])
-    async def create_entry(self,title, description, datm_start, datm_end, datm_interval_start, datm_interval_end,
-                           project_id, entry_date):
+        async for item in self.stream(query, parameters=dict(dat_start=str_to_date(dat_start=dat_start),
+                                                             dat_end=str_to_date(dat_end=dat_end),
+                                                             user_id=self.user_id), batch_size=batch_size):
+            yield item
+
+
+    def build_entry(self, title, description, datm_start, datm_end, datm_interval_start, datm_interval_end,
+                    project_id, entry_date):
         if not datm_start or not datm_end:
             raise ValidationError("Entries should have start and end!")
 
@@ -77,7 +236,7 @@ class Entries(SQLQueryAsync):
         datm_start, datm_end = str_to_datetime(datm_start=datm_start, datm_end=datm_end)
         duration = (datm_end - datm_start).seconds - interval_duration
 
-        dict_entry = {
+        return {
             "title": title,
             "description": description,
             "duration": duration,
@@ -90,56 +249,158 @@ class Entries(SQLQueryAsync):
             "user_id": self.user_id
         }
 
-        entry_id = await self.insert("entries", dict_entry)
+    @Response(desc_error="Error when exporting entries.", return_list=["stream", "media_type", "filename"])
+    async def open_export(self, export_format, dat_start=None, dat_end=None):
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(f"Unknown export format: {export_format}")
+        try:
+            str_to_date(dat_start=dat_start, dat_end=dat_end)
+        except (ValueError, TypeError):
+            raise ValidationError("Invalid date range.")
+        if export_format == 'parquet':
+            try:
+                load_pyarrow()
+            except ImportError:
+                raise ValidationError("Parquet export requires pyarrow to be installed.", status_code=501)
+
+        if export_slots.locked():
+            raise ValidationError("Too many exports in progress, try again later.", status_code=429)
+
+        media_type, extension = EXPORT_FORMATS[export_format]
+        return self.run_export(export_format, dat_start, dat_end), media_type, f"chronos-entries.{extension}"
+
+    async def run_export(self, export_format, dat_start, dat_end):
+        # Every export holds a pooled connection for its whole download, so only a few may run at once.
+        async with export_slots:
+            batches = self.stream_entries(dat_start=dat_start, dat_end=dat_end, batch_size=settings.STREAM_BATCH_SIZE)
+            async for chunk in EXPORT_WRITERS[export_format](EXPORT_COLUMNS, batches):
+                yield chunk
+
+    @Response(desc_error="Error when creating entry.", return_list=["entry_data"])
+    async def create_entry(self,title, description, datm_start, datm_end, datm_interval_start, datm_interval_end,
+                           project_id, entry_date):
+        dict_entry = self.build_entry(title=title, description=description, datm_start=datm_start,
+                                      datm_end=datm_end, datm_interval_start=datm_interval_start,
+                                      datm_interval_end=datm_interval_end, project_id=project_id,
+                                      entry_date=entry_date)
+
+        async with unit_of_work():
+            entry_id = await self.insert("entries", dict_entry)
+            await DailyRollups(self.user_id).apply(DailyRollups.entry_deltas(new_entry=dict_entry))
+            await self.publish_change()
 
         return entry_id
 
+    async def get_owned_project_ids(self, project_ids):
+        return set(await self.select("""
+        select id from projects where user_id = :user_id and id = any(CAST(:project_ids AS integer[]))
+        """, parameters=dict(user_id=self.user_id, project_ids=sorted(project_ids)), is_values_list=True,
+                                     query_name="entries.get_owned_project_ids", is_primary=True) or [])
+
+    @Response(desc_error="Error when creating entries.", return_list=["entries_results", "created_count"])
+    async def create_entries(self, entries):
+        if not entries:
+            raise ValidationError("No entries to create.")
+        if len(entries) > settings.ENTRIES_BATCH_MAX_SIZE:
+            raise ValidationError(f"A batch accepts at most {settings.ENTRIES_BATCH_MAX_SIZE} entries.",
+                                  status_code=413)
+
+        results, dict_entries = [], []
+        for index, entry_data in enumerate(entries):
+            try:
+                dict_entry = self.build_entry(title=entry_data.title, description=entry_data.description,
+                                              datm_start=entry_data.datm_start, datm_end=entry_data.datm_end,
+                                              datm_interval_start=entry_data.datm_interval_start,
+                                              datm_interval_end=entry_data.datm_interval_end,
+                                              project_id=entry_data.project_id, entry_date=entry_data.date)
+            except ValidationError as e:
+                results.append({"index": index, "status": False, "description": e.message, "id": None})
+            except (ValueError, TypeError):
+                results.append({"index": index, "status": False, "description": "Invalid date format.", "id": None})
+            else:
+                results.append({"index": index, "status": True, "description": "", "id": None})
+                dict_entries.append((index, dict_entry))
+
+        owned_project_ids = await self.get_owned_project_ids({dict_entry["project_id"]
+                                                              for _, dict_entry in dict_entries})
+        for index, dict_entry in dict_entries:
+            if dict_entry["project_id"] not in owned_project_ids:
+                results[index].update(status=False, description="Project not found.")
+        dict_entries = [(index, dict_entry) for index, dict_entry in dict_entries if results[index]["status"]]
+
+        if not dict_entries:
+            raise ValidationError("No valid entries to create.", result=(results, 0))
+
+        async with unit_of_work():
+            entry_ids = await self.bulk_insert("entries", [dict_entry for _, dict_entry in dict_entries])
+            await DailyRollups(self.user_id).apply(DailyRollups.entries_deltas([dict_entry
+                                                                                for _, dict_entry in dict_entries]))
+            await self.publish_change()
+
+        for (index, _), entry_id in zip(dict_entries, entry_ids):
+            results[index]["id"] = entry_id
+
+        return results, len(entry_ids)
+
     @Response(desc_error="Error when deleting entry.", return_list=[])
     async def soft_delete_entry(self, entry_id):
-        if await self.validate_entry_user(entry_id):
+        async with unit_of_work():
+            entry = await self.lock_entry(entry_id)
+            if not entry:
+                raise ValidationError("You do not have permission to delete this entry.", status_code=401)
+
             await self.disable("entries", dict_filter={"id": entry_id})
-        else:
-            raise ValidationError("You do not have permission to delete this entry.", status_code=401)
+            if entry['status']:
+                await DailyRollups(self.user_id).apply(DailyRollups.entry_deltas(old_entry=entry))
+            await self.publish_change()
 
-    async def validate_entry_user(self, entry_id):
+    async def lock_entry(self, entry_id):
         return await self.select(query=f"""
-        select true from entries where id = :entry_id and user_id = :user_id
-        """, parameters=dict(user_id=self.user_id, entry_id=entry_id), is_first=True, is_values_list=True) or False
+        select id, status, date, duration from entries where id = :entry_id and user_id = :user_id for update
+        """, parameters=dict(user_id=self.user_id, entry_id=entry_id), is_first=True,
+                                 query_name="entries.lock_entry", is_primary=True)
 
 
     @Response(desc_error="Error editing entry.", return_list=[])
     async def put_entry(self, entry_id, entry_data):
-        if await self.validate_entry_user(entry_id):
-            if entry_data.datm_interval_start:
-                datm_interval_start, datm_interval_end = str_to_datetime(datm_interval_start=entry_data.datm_interval_start,
-                                                                         datm_interval_end=entry_data.datm_interval_end)
-                interval_duration = (datm_interval_end - datm_interval_start).seconds
-            else:
-                interval_duration = 0
+        if entry_data.datm_interval_start:
+            datm_interval_start, datm_interval_end = str_to_datetime(datm_interval_start=entry_data.datm_interval_start,
+                                                                     datm_interval_end=entry_data.datm_interval_end)
+            interval_duration = (datm_interval_end - datm_interval_start).seconds
+        else:
+            interval_duration = 0
 
-            datm_start, datm_end = str_to_datetime(datm_start=entry_data.datm_start, datm_end=entry_data.datm_end)
+        datm_start, datm_end = str_to_datetime(datm_start=entry_data.datm_start, datm_end=entry_data.datm_end)
 
-            duration = (datm_end - datm_start).seconds - interval_duration
+        duration = (datm_end - datm_start).seconds - interval_duration
+
+        dict_patch = {
+            'title': entry_data.title,
+            'description': entry_data.description,
+            'duration': duration,
+            'datm_start': str_to_datetime(datm_start=entry_data.datm_start),
+            'datm_end': str_to_datetime(datm_end=entry_data.datm_end),
+            'datm_interval_start': str_to_datetime(datm_interval_start=entry_data.datm_interval_start) if \
+                entry_data.datm_interval_start else None,
+            'datm_interval_end': str_to_datetime(datm_interval_end=entry_data.datm_interval_end) if\
+                entry_data.datm_interval_end else None,
+            'project_id': entry_data.project_id,
+            "date": str_to_date(entry_date=entry_data.date) if entry_data.date else None,
+        }
 
-            dict_patch = {
-                'title': entry_data.title,
-                'description': entry_data.description,
-                'duration': duration,
-                'datm_start': str_to_datetime(datm_start=entry_data.datm_start),
-                'datm_end': str_to_datetime(datm_end=entry_data.datm_end),
-                'datm_interval_start': str_to_datetime(datm_interval_start=entry_data.datm_interval_start) if \
-                    entry_data.datm_interval_start else None,
-                'datm_interval_end': str_to_datetime(datm_interval_end=entry_data.datm_interval_end) if\
-                    entry_data.datm_interval_end else None,
-                'project_id': entry_data.project_id,
-                "date": str_to_date(entry_date=entry_data.date) if entry_data.date else None,
-            }
+        dict_patch = {k:v for k, v in dict_patch.items() if v is not None}
 
-            dict_patch = {k:v for k, v in dict_patch.items() if v is not None}
+        async with unit_of_work():
+            entry = await self.lock_entry(entry_id)
+            if not entry:
+                raise ValidationError("You do not have permission to update this entry.", status_code=401)
+            if not entry['status']:
+                raise ValidationError("Entry not found.", status_code=404)
 
             await self.update("entries", dict_patch, dict_filter={"id": entry_id})
-        else:
-            raise ValidationError("You do not have permission to update this entry.", status_code=401)
+            await DailyRollups(self.user_id).apply(DailyRollups.entry_deltas(old_entry=entry,
+                                                                             new_entry={**entry, **dict_patch}))
+            await self.publish_change()
 
 
     @Response(desc_error="Error when fetching cards.", return_list=["cards_dict"])
@@ -147,11 +408,11 @@ class Entries(SQLQueryAsync):
         dat_start, dat_end = str_to_date(dat_start=dat_start, dat_end=dat_end)
 
         query = f"""
-        select sum(e.duration) as total_logged
-        from public.entries e 
-        where e.status = true 
-              and e.user_id = :user_id
-              and e.date between :dat_start and :dat_end
+        select sum(r.total_duration)::bigint as total_logged
+        from public.entry_daily_rollups r
+        where r.user_id = :user_id
+              and r.entry_count > 0
+              and r.date between :dat_start and :dat_end
         """
 
         entries_cards_dict = await self.select(query, parameters=dict(dat_start=dat_start, dat_end=dat_end,
@@ -160,76 +421,134 @@ class Entries(SQLQueryAsync):
         return entries_cards_dict
 
 
-    @Response(desc_error="Error when fetching streak.", return_list=['entries_streak'])
+    @Response(desc_error="Error when fetching streak.", return_list=['entries_streak', 'longest_streak'])
     async def get_entries_streak(self):
-        query = f"""
-        WITH numbered AS (
-          SELECT
-            date,
-            ROW_NUMBER() OVER (ORDER BY date) AS rn
-          FROM entries
-          WHERE date <= CURRENT_DATE
-                and user_id = :user_id
-                and status = TRUE
-        ),
-        grouped AS (
-          SELECT
-            date,
-            rn,
-            date - (rn || ' days')::interval AS grp
-          FROM numbered
-        ),
-        streaks AS (
-          SELECT
-            MIN(date) AS streak_start,
-            MAX(date) AS streak_end,
-            COUNT(*) AS streak_length
-          FROM grouped
-          GROUP BY grp
-        )
-        SELECT
-          streak_length
-        FROM streaks
-        WHERE streak_end = CURRENT_DATE;
-        """
+        bitmaps = await DailyRollups(self.user_id).get_bitmaps()
+
+        return day_bitmap.streaks(bitmaps, date.today())
 
-        streak = await self.select(query, parameters=dict(user_id=self.user_id),
-                                   is_first=True, is_values_list=True) or 0
+    @Response(desc_error="Error when fetching heatmap.", return_list=['year', 'heatmap', 'active_days'])
+    async def get_entries_heatmap(self, year=None):
+        year = year or date.today().year
+        if not 1 <= year <= 9999:
+            raise ValidationError("Invalid year.")
 
-        return streak
+        bitmaps = await DailyRollups(self.user_id).get_bitmaps(year=year)
+        heatmap = day_bitmap.to_list(bitmaps.get(year), year)
+
+        return year, heatmap, sum(heatmap)
 
     @Response(desc_error="Error when fetching days.", return_list=['entries_days'])
-    async def get_days_entries(self, dat_start, dat_end):
+    async def get_days_entries(self, dat_start, dat_end, result_format='dict'):
         query = """
-        WITH RECURSIVE calendar AS (
-              SELECT (:dat_start)::DATE AS day
-              UNION ALL
-              SELECT (day + INTERVAL '1 day')::DATE
-              FROM calendar
-              WHERE day + INTERVAL '1 day' <= DATE (:dat_end)::DATE
-            )
-            SELECT
-              calendar.day::varchar,
-              sum(e.duration) as daily_duration,
-              CASE WHEN e.date IS NOT NULL THEN true ELSE false END as have_entries
-            FROM
-              calendar
-            LEFT JOIN entries e
-                ON e.date = calendar.day
-                  and e.user_id = :user_id
-                  and e.date between :dat_start and :dat_end
-                  and e.status = TRUE
-            GROUP BY
-                calendar.day, e.date
-            ORDER BY
-              calendar.day;
+        SELECT
+          calendar.day::date::varchar as day,
+          r.total_duration as daily_duration,
+          r.date IS NOT NULL as have_entries
+        FROM
+          generate_series(CAST(:dat_start AS date), CAST(:dat_end AS date), INTERVAL '1 day') AS calendar(day)
+        LEFT JOIN entry_daily_rollups r
+            ON r.date = calendar.day::date
+              and r.user_id = :user_id
+              and r.entry_count > 0
+        ORDER BY
+          calendar.day;
         """
         dat_start, dat_end = str_to_date(dat_start=dat_start, dat_end=dat_end)
 
-        ls_entries = await self.select(query, parameters=dict(dat_start=dat_start, dat_end=dat_end, user_id=self.user_id))
+        ls_entries = await self.select(query, parameters=dict(dat_start=dat_start, dat_end=dat_end, user_id=self.user_id),
+                                       result_format=result_format)
 
         return ls_entries
 
+    @staticmethod
+    async def timed_part(name, method, **kwargs):
+        started_at = time.perf_counter()
+        async with detached():
+            response = await method(**kwargs)
+        return name, response, round((time.perf_counter() - started_at) * 1000, 3)
+
+    async def gather_parts(self, parts):
+        started_at = time.perf_counter()
+        results = await asyncio.gather(*[self.timed_part(name, method, **kwargs)
+                                         for name, (method, kwargs) in parts.items()])
+
+        for name, response, _ in results:
+            if not response['status']:
+                raise ValidationError(response['description'], status_code=response['status_code'])
+
+        responses = {name: response for name, response, _ in results}
+        timings = {name: duration_ms for name, _, duration_ms in results}
+        timings['total'] = round((time.perf_counter() - started_at) * 1000, 3)
+        return responses, timings
+
+    async def get_dashboard_payload(self, dat_start, dat_end):
+        responses, _ = await self.gather_parts({
+            "cards": (self.get_entries_cards, dict(dat_start=dat_start, dat_end=dat_end)),
+            "days": (self.get_days_entries, dict(dat_start=dat_start, dat_end=dat_end)),
+            "streak": (self.get_entries_streak, dict()),
+        })
+
+        return {
+            "cards_dict": responses["cards"]["cards_dict"],
+            "entries_days": responses["days"]["entries_days"],
+            "entries_streak": responses["streak"]["entries_streak"],
+            "longest_streak": responses["streak"]["longest_streak"],
+        }
+
+    @Response(desc_error="Error when fetching dashboard.",
+              return_list=["cards_dict", "entries_days", "entries_streak", "longest_streak", "projects_list",
+                           "timings"])
+    async def get_dashboard(self, dat_start, dat_end, result_format='dict'):
+        responses, timings = await self.gather_parts({
+            "cards": (self.get_entries_cards, dict(dat_start=dat_start, dat_end=dat_end)),
+            "days": (self.get_days_entries, dict(dat_start=dat_start, dat_end=dat_end, result_format=result_format)),
+            "streak": (self.get_entries_streak, dict()),
+            "projects": (self.get_projects, dict()),
+        })
+
+        return (responses["cards"]["cards_dict"], responses["days"]["entries_days"],
+                responses["streak"]["entries_streak"], responses["streak"]["longest_streak"],
+                responses["projects"]["projects_list"], timings)
+
+    @Response(desc_error="Error when opening dashboard stream.", return_list=["stream"])
+    async def open_dashboard_stream(self, dat_start, dat_end):
+        try:
+            str_to_date(dat_start=dat_start, dat_end=dat_end)
+        except (ValueError, TypeError):
+            raise ValidationError("Invalid date range.")
+
+        return self.stream_dashboard(dat_start=dat_start, dat_end=dat_end)
+
+    async def stream_dashboard(self, dat_start, dat_end):
+        yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+
+        version = None
+        generation = event_bus.generation
+        while True:
+            if event_bus.version(self.user_id) == version:
+                yield ": heartbeat\n\n"
+                await event_bus.wait(self.user_id, version, timeout=settings.SSE_HEARTBEAT_SECONDS)
+                continue
+
+            # A listener reconnect refreshes every stream at once, so spread those refreshes out.
+            if event_bus.generation != generation:
+                generation = event_bus.generation
+                await asyncio.sleep(random.uniform(0, settings.SSE_REFRESH_JITTER_SECONDS))
+
+            try:
+                async with dashboard_refreshes:
+                    current_version = event_bus.version(self.user_id)
+                    payload = await self.get_dashboard_payload(dat_start=dat_start, dat_end=dat_end)
+            except Exception:
+                logger.warning("Failed to refresh the dashboard stream of user %s", self.user_id, exc_info=True)
+                yield f"event: error\ndata: {json.dumps({'description': 'Error when fetching dashboard.'})}\n\n"
+                await asyncio.sleep(settings.SSE_HEARTBEAT_SECONDS)
+                continue
+
+            version = current_version
+            yield f"id: {version}\nevent: dashboard\ndata: {json.dumps(payload, default=str)}\n\n"
+
     @Response(desc_error="Error when creating project", return_list=["project_id"])
     async def create_project(self, project_name):
         project_dict = {
@@ -237,7 +556,9 @@ class Entries(SQLQueryAsync):
             "user_id":self.user_id
         }
 
-        project_id = await self.insert("projects", project_dict)
+        async with unit_of_work():
+            project_id = await self.insert("projects", project_dict)
+            await self.publish_change()
 
         return project_id
 
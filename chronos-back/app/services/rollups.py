@@ -0,0 +1,189 @@
+from collections import defaultdict
+from datetime import date
+from app.core.day_bitmap import BITMAP_BYTES
+from app.core.sql_async import SQLQueryAsync
+from app.db.unit_of_work import unit_of_work
+
+
+class DailyRollups(SQLQueryAsync):
+    def __init__(self, user_id=None):
+        super().__init__()
+        self.user_id = user_id
+
+    @staticmethod
+    def entry_deltas(old_entry=None, new_entry=None):
+        deltas = defaultdict(lambda: [0, 0])
+        if old_entry:
+            deltas[old_entry['date']][0] -= old_entry['duration'] or 0
+            deltas[old_entry['date']][1] -= 1
+        if new_entry:
+            deltas[new_entry['date']][0] += new_entry['duration'] or 0
+            deltas[new_entry['date']][1] += 1
+        return {day: delta for day, delta in deltas.items() if day is not None and delta != [0, 0]}
+
+    @staticmethod
+    def entries_deltas(new_entries):
+        deltas = defaultdict(lambda: [0, 0])
+        for new_entry in new_entries:
+            deltas[new_entry['date']][0] += new_entry['duration'] or 0
+            deltas[new_entry['date']][1] += 1
+        return {day: delta for day, delta in deltas.items() if day is not None}
+
+    @staticmethod
+    def bitmap_query(filter, keys):
+        return f"""
+        with active_days as (
+            select user_id, extract(year from date)::int as year, extract(doy from date)::int - 1 as day
+            from entry_daily_rollups
+            where entry_count > 0
+                  {filter}
+        ),
+        active_bytes as (
+            select user_id, year, day / 8 as byte, sum(1 << (day % 8)) as value
+            from active_days
+            group by user_id, year, day / 8
+        ),
+        bitmap_keys as (
+            {keys}
+        )
+        select k.user_id,
+               k.year,
+               decode(string_agg(lpad(to_hex(coalesce(b.value, 0)), 2, '0'), '' order by s.byte), 'hex') as days
+        from bitmap_keys k
+            cross join generate_series(0, {BITMAP_BYTES - 1}) as s(byte)
+            left join active_bytes b
+                on b.user_id = k.user_id
+                   and b.year = k.year
+                   and b.byte = s.byte
+        group by k.user_id, k.year
+        """
+
+    async def refresh_bitmaps(self, years):
+        years = sorted(set(years))
+        if not years:
+            return
+
+        await self.execute("select pg_advisory_xact_lock(hashtext('user_activity_bitmaps'), :user_id)",
+                           parameters=dict(user_id=self.user_id), query_name="rollups.lock_bitmaps")
+        await self.execute(f"""
+        insert into user_activity_bitmaps (user_id, year, days)
+        {self.bitmap_query(filter="and user_id = :user_id and date >= :date_start and date < :date_end",
+                           keys="select CAST(:user_id AS integer) as user_id, unnest(CAST(:years AS integer[])) as year")}
+        on conflict (user_id, year) do update
+            set days = excluded.days
+        """, parameters=dict(user_id=self.user_id, years=years, date_start=date(years[0], 1, 1),
+                             date_end=date(years[-1] + 1, 1, 1)), query_name="rollups.refresh_bitmaps")
+
+    async def get_bitmaps(self, year=None):
+        rows = await self.select(f"""
+        select year, days from user_activity_bitmaps
+        where user_id = :user_id
+              {"and year = :year" if year else ""}
+        """, parameters=dict(user_id=self.user_id, year=year), result_format='tuples',
+                                 query_name="rollups.get_bitmaps")
+        return {row_year: bytes(days) for row_year, days in rows['rows']}
+
+    async def apply(self, deltas):
+        if not deltas:
+            return
+
+        days = sorted(deltas)
+        async with unit_of_work():
+            await self.execute("""
+            insert into entry_daily_rollups (user_id, date, total_duration, entry_count)
+            select :user_id, t.date, t.total_duration, t.entry_count
+            from unnest(CAST(:days AS date[]), CAST(:durations AS bigint[]), CAST(:counts AS integer[]))
+                as t(date, total_duration, entry_count)
+            on conflict (user_id, date) do update
+                set total_duration = entry_daily_rollups.total_duration + excluded.total_duration,
+                    entry_count = entry_daily_rollups.entry_count + excluded.entry_count
+            """, parameters=dict(user_id=self.user_id, days=days, durations=[deltas[day][0] for day in days],
+                                 counts=[deltas[day][1] for day in days]), query_name="rollups.apply")
+            await self.refresh_bitmaps(day.year for day in days)
+
+    async def rebuild(self):
+        filter = f"where user_id = :user_id" if self.user_id else f""
+
+        async with unit_of_work():
+            await self.execute(f"delete from entry_daily_rollups {filter}", parameters=dict(user_id=self.user_id),
+                               query_name="rollups.rebuild.delete")
+            rows = await self.execute(f"""
+            insert into entry_daily_rollups (user_id, date, total_duration, entry_count)
+            select user_id, date, coalesce(sum(duration), 0), count(*)
+            from entries
+            where status = true
+                  and user_id is not null
+                  and date is not null
+                  {"and user_id = :user_id" if self.user_id else ""}
+            group by user_id, date
+            returning user_id
+            """, parameters=dict(user_id=self.user_id), query_name="rollups.rebuild.insert")
+
+            await self.execute(f"delete from user_activity_bitmaps {filter}", parameters=dict(user_id=self.user_id),
+                               query_name="rollups.rebuild.delete_bitmaps")
+            await self.execute(f"""
+            insert into user_activity_bitmaps (user_id, year, days)
+            {self.bitmap_query(filter="and user_id = :user_id" if self.user_id else "",
+                               keys="select distinct user_id, year from active_days")}
+            """, parameters=dict(user_id=self.user_id), query_name="rollups.rebuild.bitmaps")
+
+        return len(rows or [])
+
+    async def check(self):
+        filter = f"and user_id = :user_id" if self.user_id else f""
+
+        return await self.select(f"""
+        with raw as (
+            select user_id, date, coalesce(sum(duration), 0) as total_duration, count(*) as entry_count
+            from entries
+            where status = true
+                  and user_id is not null
+                  and date is not null
+                  {filter}
+            group by user_id, date
+        ),
+        rollup as (
+            select user_id, date, total_duration, entry_count
+            from entry_daily_rollups
+            where entry_count <> 0
+                  {filter}
+        )
+        select coalesce(raw.user_id, rollup.user_id) as user_id,
+               coalesce(raw.date, rollup.date)::varchar as date,
+               raw.total_duration as expected_duration,
+               rollup.total_duration as rollup_duration,
+               raw.entry_count as expected_count,
+               rollup.entry_count as rollup_count
+        from raw
+            full outer join rollup
+                on rollup.user_id = raw.user_id
+                   and rollup.date = raw.date
+        where raw.total_duration is distinct from rollup.total_duration
+              or raw.entry_count is distinct from rollup.entry_count
+        order by 1, 2
+        """, parameters=dict(user_id=self.user_id), query_name="rollups.check", is_primary=True)
+
+    async def check_bitmaps(self):
+        filter = f"and user_id = :user_id" if self.user_id else f""
+
+        return await self.select(f"""
+        with expected as (
+            {self.bitmap_query(filter=filter, keys="select distinct user_id, year from active_days")}
+        ),
+        stored as (
+            select user_id, year, days
+            from user_activity_bitmaps
+            where days <> decode(repeat('00', {BITMAP_BYTES}), 'hex')
+                  {filter}
+        )
+        select coalesce(expected.user_id, stored.user_id) as user_id,
+               coalesce(expected.year, stored.year) as year,
+               encode(expected.days, 'hex') as expected_days,
+               encode(stored.days, 'hex') as stored_days
+        from expected
+            full outer join stored
+                on stored.user_id = expected.user_id
+                   and stored.year = expected.year
+        where expected.days is distinct from stored.days
+        order by 1, 2
+        """, parameters=dict(user_id=self.user_id), query_name="rollups.check_bitmaps", is_primary=True)
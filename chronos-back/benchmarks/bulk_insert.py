@@ -0,0 +1,96 @@
+import asyncio
+import sys
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import text
+from app.core.sql_async import SQLQueryAsync
+from app.db.session import engine
+
+TABLE_NAME = "bench_bulk_entries"
+ROW_COUNTS = [1_000, 10_000, 100_000]
+
+
+def build_rows(count):
+    datm_start = datetime(2025, 1, 1, 9)
+    return [{
+        "title": f"Entry {i}",
+        "description": "Benchmark entry",
+        "duration": 3600,
+        "datm_start": datm_start,
+        "datm_end": datm_start + timedelta(hours=1),
+        "date": date(2025, 1, 1) + timedelta(days=i % 365),
+        "project_id": 1,
+        "user_id": 1,
+    } for i in range(count)]
+
+
+async def legacy_bulk_insert(rows):
+    sql_query = SQLQueryAsync()
+    parameters = {}
+    values = ''
+    columns = ','.join(list(rows[0].keys()) + ['status', 'created_at'])
+    for count, row in enumerate(rows):
+        row = {**row, 'status': True, 'created_at': datetime.utcnow()}
+        values += '(' + ','.join([f":{k}_{count}" for k in row]) + '),'
+        parameters.update({f"{k}_{count}": v for k, v in row.items()})
+
+    query = f'INSERT INTO {TABLE_NAME}({columns}) VALUES {values.rstrip(",")} RETURNING id;'
+    return await sql_query.execute(query, parameters=parameters, is_values_list=True)
+
+
+async def unnest_bulk_insert(rows):
+    return await SQLQueryAsync().bulk_insert(TABLE_NAME, rows)
+
+
+async def copy_bulk_insert(rows):
+    return await SQLQueryAsync().bulk_copy(TABLE_NAME, rows)
+
+
+async def reset_table():
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE_NAME}"))
+        await conn.execute(text(f"""
+            CREATE TABLE {TABLE_NAME} (
+                id SERIAL PRIMARY KEY,
+                created_at TIMESTAMP,
+                title VARCHAR(200),
+                description TEXT,
+                duration INTEGER,
+                datm_start TIMESTAMP,
+                datm_end TIMESTAMP,
+                status BOOLEAN,
+                date DATE,
+                project_id INTEGER,
+                user_id INTEGER
+            )
+        """))
+
+
+async def main(row_counts):
+    strategies = [
+        ("legacy VALUES", legacy_bulk_insert),
+        ("unnest arrays + RETURNING", unnest_bulk_insert),
+        ("binary COPY", copy_bulk_insert),
+    ]
+
+    print(f"{'rows':>8}  {'strategy':<28} {'seconds':>9} {'rows/s':>10}")
+    for row_count in row_counts:
+        for name, strategy in strategies:
+            await reset_table()
+            rows = build_rows(row_count)
+            started_at = time.perf_counter()
+            try:
+                await strategy(rows)
+            except Exception as e:
+                print(f"{row_count:>8}  {name:<28} {'failed':>9}  {type(e).__name__}")
+                continue
+            elapsed = time.perf_counter() - started_at
+            print(f"{row_count:>8}  {name:<28} {elapsed:>9.3f} {row_count / elapsed:>10.0f}")
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE_NAME}"))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or ROW_COUNTS))
@@ -0,0 +1,55 @@
+import sys
+import timeit
+import tracemalloc
+from datetime import date, datetime
+from app.core.result_formats import to_columns, to_dicts, to_rows, to_tuples
+
+KEYS = ('id', 'title', 'description', 'duration', 'datm_start', 'datm_end', 'datm_interval_start',
+        'datm_interval_end', 'project_name', 'entrie_date')
+
+
+def build_rows(count):
+    return [(i, f"Entry {i}", "Benchmark entry", 3600, datetime(2025, 1, 1, 9), datetime(2025, 1, 1, 10), None, None,
+             "Chronos", date(2025, 1, 1)) for i in range(count)]
+
+
+def values_list_from_dicts(keys, rows):
+    return [tuple(row.values()) for row in to_dicts(keys, rows)]
+
+
+def values_list_from_tuples(keys, rows):
+    return [tuple(row) for row in rows]
+
+
+def measure(function, rows, repeat):
+    seconds = min(timeit.repeat(lambda: function(KEYS, rows), number=1, repeat=repeat))
+
+    tracemalloc.start()
+    result = function(KEYS, rows)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return seconds, retained, peak
+
+
+def main(row_count=10_000, repeat=5):
+    rows = build_rows(row_count)
+    formats = [
+        ("dict", to_dicts),
+        ("tuples", to_tuples),
+        ("columns", to_columns),
+        ("rows", to_rows),
+        ("values_list via dicts", values_list_from_dicts),
+        ("values_list via tuples", values_list_from_tuples),
+    ]
+
+    print(f"{row_count} rows x {len(KEYS)} columns")
+    print(f"{'format':<24} {'ms':>8} {'retained KiB':>13} {'peak KiB':>10}")
+    for name, function in formats:
+        seconds, retained, peak = measure(function, rows, repeat)
+        print(f"{name:<24} {seconds * 1000:>8.2f} {retained / 1024:>13.1f} {peak / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+import json
+from app.db.session import dispose_engines
+from app.services.rollups import DailyRollups
+
+
+async def rebuild(user_id=None):
+    rows = await DailyRollups(user_id).rebuild()
+    print(f"Rebuilt {rows} daily rollup rows and their activity bitmaps.")
+
+
+async def check(user_id=None):
+    rollups = DailyRollups(user_id)
+    mismatches = await rollups.check()
+    for mismatch in mismatches:
+        print(json.dumps(mismatch))
+    print(f"{len(mismatches)} mismatched daily rollup rows.")
+
+    bitmap_mismatches = await rollups.check_bitmaps()
+    for mismatch in bitmap_mismatches:
+        print(json.dumps(mismatch))
+    print(f"{len(bitmap_mismatches)} mismatched activity bitmaps.")
+    return not mismatches and not bitmap_mismatches
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Maintain the entry_daily_rollups and user_activity_bitmaps tables.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "rebuild":
+            await rebuild(args.user_id)
+            return 0
+        return 0 if await check(args.user_id) else 1
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))